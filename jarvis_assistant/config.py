@@ -14,5 +14,22 @@ USER_APP_PATHS = {
     # "example_custom_app": "/path/to/your/custom/app_executable"
 }
 
+# Speech-to-text backend used by SpeechRecognizer:
+#   "google_web"             - Free Google Web Speech API via SpeechRecognition (records the whole phrase, then uploads it).
+#   "google_cloud_streaming" - Google Cloud Speech-to-Text streaming API; audio is uploaded while the user is still
+#                              speaking. Needs the google-cloud-speech package and Google Cloud credentials
+#                              (GOOGLE_APPLICATION_CREDENTIALS). Falls back to "google_web" if unavailable.
+#   "faster_whisper"         - Offline recognition with faster-whisper on the local CPU/GPU, no network round-trip.
+#                              Needs the faster-whisper package; the model is downloaded on first use.
+#                              Falls back to "google_web" if unavailable.
+STT_BACKEND = "google_web"
+# Whisper model used by the "faster_whisper" backend, e.g. "tiny.en", "base.en", "small.en".
+WHISPER_MODEL_SIZE = "small.en"
+
+# Input method you usually pick at startup: "s" (speech), "t" (text) or None. With "s", or when speech was
+# used in the previous session, the microphone is opened and calibrated while the input-method prompt is
+# still shown, so choosing speech starts without waiting for the audio device.
+PREFERRED_INPUT_METHOD = None
+
 # Other configurations can be added here
 # e.g., preferred search engine, media player paths, etc.
@@ -1,153 +1,812 @@
 # LLM interaction, intent recognition
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from jarvis_assistant.config import GEMINI_API_KEY
+from jarvis_assistant.core.llm_cache import LLMCache, TemplateCache
 from jarvis_assistant.utils.logger import get_logger
+import asyncio
+import contextlib
+import functools
+import logging
 import json
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    # orjson parses small JSON payloads noticeably faster than the stdlib; optional dependency.
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+try:
+    # jiter can parse incomplete JSON, used to surface entities while a streamed response is still arriving.
+    import jiter
+except ImportError:
+    jiter = None
 
 # Ensure get_logger can be found if this module is run standalone for testing
 if __name__ == '__main__' and __package__ is None:
     import sys
-    import os
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
+    from jarvis_assistant.core.llm_cache import LLMCache, TemplateCache
     from jarvis_assistant.utils.logger import get_logger
 
+@functools.cache
+def _configure_genai():
+    """Configures the Gemini SDK with the API key. Cached so it runs once per process."""
+    genai.configure(api_key=GEMINI_API_KEY)
+
+_parser = None
+_parser_lock = threading.Lock()
+
+def get_parser() -> "CommandParser":
+    """
+    Returns the process-wide CommandParser, creating it on first use.
+    This is the intended entry point; constructing CommandParser directly re-creates the
+    model handle and loses the in-memory caches. Raises ValueError if the API key is missing.
+    """
+    global _parser
+    if _parser is None:
+        with _parser_lock: # Double-checked so concurrent first calls build a single instance
+            if _parser is None:
+                _parser = CommandParser()
+    return _parser
+
 class CommandParser:
+    # Intents the LLM may return. Kept in sync with the prompt and main.py's dispatching.
+    INTENTS = (
+        "create_file", "create_directory", "delete_path", "move_path", "list_directory_contents",
+        "execute_command", "set_brightness", "set_volume", "open_app", "close_app",
+        "open_website", "search_info", "summarize_text", "media_play", "media_pause",
+        "media_skip", "media_previous", "fill_web_form", "simulate_online_purchase",
+        "general_query", "store_auth_info", "get_auth_info", "exit", "unknown",
+    )
+
+    # Response schema for Gemini's JSON mode. The model is constrained to emit an object
+    # matching this schema, so the response can be passed straight to the JSON decoder.
+    # Descriptions carry the entity conventions that used to be spelled out in the prompt.
+    # Gemini requires OBJECT types to declare their properties, so "entities" lists every
+    # entity key used by any intent; all of them are optional.
+    _ENTITIES_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "filepath": {"type": "string", "description": "File path; map 'desktop'/'my documents' to the user folders, keep relative paths relative, add an extension matching file_type"},
+            "content": {"type": "string"},
+            "file_type": {"type": "string", "enum": ["txt", "document", "spreadsheet"]},
+            "dir_path": {"type": "string"},
+            "path": {"type": "string"},
+            "source_path": {"type": "string"},
+            "destination_path": {"type": "string"},
+            "command_str": {"type": "string", "description": "Command to run, may be multi-line"},
+            "shell_type": {"type": "string", "enum": ["cmd", "powershell", "bash", "sh", "zsh"]},
+            "level": {"type": "number", "description": "Brightness: integer 0-100. Volume: 0.0-1.0 ('50%' -> 0.5, 'mute' -> 0.0, 'max' -> 1.0)"},
+            "app_name": {"type": "string", "description": "Application name, alias or path ('Word' may mean 'Microsoft Word')"},
+            "url": {"type": "string", "description": "Full URL, e.g. 'google.com' -> 'https://google.com'"},
+            "query": {"type": "string"},
+            "summarize": {"type": "boolean", "description": "True if the user asks to search AND summarize"},
+            "text_to_summarize": {"type": "string"},
+            "source_url": {"type": "string"},
+            "player_name": {"type": "string", "description": "spotify, apple music, native or default (when unspecified)"},
+            "track_or_playlist": {"type": "string", "description": "Optional track, album or playlist name/URI"},
+            "form_type_identifier": {"type": "string"},
+            "data_profile_key": {"type": "string"},
+            "item_description": {"type": "string"},
+            "site_url": {"type": "string"},
+            "dummy_data_profile_key": {"type": "string"},
+            "query_text": {"type": "string", "description": "The full user query"},
+            "service_name": {"type": "string"},
+            "username": {"type": "string"},
+            "data_to_store": {"type": "string"},
+        },
+    }
+    _ACTION_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "intent": {"type": "string", "enum": list(INTENTS)},
+            "entities": _ENTITIES_SCHEMA,
+        },
+        "required": ["intent", "entities"],
+    }
+    # An utterance with several commands ("create a.txt and b.txt") lists all of them, in order, in
+    # "actions"; intent/entities then hold the first one, so single-action consumers keep working.
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            **_ACTION_SCHEMA["properties"],
+            "actions": {
+                "type": "array", "items": _ACTION_SCHEMA,
+                "description": "Only for commands asking for several actions: all of them, in order",
+            },
+        },
+        "required": ["intent", "entities"],
+    }
+
+    # Static instructions, passed once as the models' system_instruction so each request only carries
+    # the user command (see _build_prompt). Output structure and per-entity conventions live in SCHEMA
+    # (enforced by JSON mode), so the instructions only need to say which entity keys belong to which intent.
+    # Two few-shot pairs show the conventions most often gotten wrong (volume scale, search + summarize flag).
+    # Written one intent per line for readability; whitespace is squashed since the model doesn't need it.
+    _SYSTEM_INSTRUCTION = " ".join("""
+        Parse the desktop-assistant command into intent and entities. Entity keys per intent:
+        create_file: filepath, content, file_type; create_directory: dir_path; delete_path: path;
+        move_path: source_path, destination_path; list_directory_contents: dir_path;
+        execute_command: command_str, shell_type; set_brightness, set_volume: level;
+        open_app, close_app: app_name; open_website: url; search_info: query, summarize;
+        summarize_text: text_to_summarize, source_url, filepath; media_play: player_name, track_or_playlist;
+        media_pause, media_skip, media_previous: player_name;
+        fill_web_form: url, form_type_identifier, data_profile_key;
+        simulate_online_purchase: item_description, site_url, dummy_data_profile_key;
+        general_query: query_text; store_auth_info: service_name, username, data_to_store;
+        get_auth_info: service_name, username.
+        "next track" = media_skip; "previous track"/"rewind"/"go back" = media_previous.
+        Chat (time, jokes) = general_query; nothing fits = unknown.
+        Several actions in one command: list all of them, in order, in actions; intent and entities repeat the first.
+        Examples:
+        Command: "set volume to 30%" -> {"intent": "set_volume", "entities": {"level": 0.3}}
+        Command: "search for python tutorials and summarize them" ->
+        {"intent": "search_info", "entities": {"query": "python tutorials", "summarize": true}}
+    """.split())
+    _PROMPT_PREFIX = 'Command: "'
+    _PROMPT_SUFFIX = '"\n'
+
+    # Matches the intent value as soon as it has fully streamed in, e.g. '{"intent": "media_play", "enti'
+    _STREAM_INTENT_RE = re.compile(r'"intent"\s*:\s*"([a-z_]+)"')
+
+    # Outermost {...} span (greedy), used to recover JSON wrapped in prose or markdown fences.
+    _JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+    _SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"})
+
+    # Transient Gemini failures (quota 429s, 5xx, timeouts) are retried with jittered exponential
+    # backoff instead of surfacing as an 'unknown' intent. Each attempt is capped at REQUEST_TIMEOUT_SECONDS.
+    _RETRYABLE_ERRORS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+        TimeoutError,
+    )
+    # Short waits (~200 ms, then ~400 ms) keep a retried voice command responsive; the per-attempt
+    # timeout bounds slow tails instead of waiting on them.
+    MAX_ATTEMPTS = 3
+    BACKOFF_BASE_SECONDS = 0.2
+    BACKOFF_MAX_SECONDS = 0.8
+    REQUEST_TIMEOUT_SECONDS = 8.0
+    # Idle connections to the API get closed; keep_warm() re-pings after this long without a request
+    KEEP_WARM_INTERVAL_SECONDS = 50
+
+    # Commands that go straight to the full model: long inputs, or ones with multiple clauses,
+    # free-text payloads or multi-step web flows, which the smaller model gets wrong more often.
+    FAST_MODEL_MAX_CHARS = 40
+    _COMPLEX_COMMAND_RE = re.compile(
+        r"\b(?:and|then|content|containing|summari[sz]e|command|script|form|purchase|buy|password|username)\b"
+    )
+
+    # Persistent cache of parsed commands, shared across restarts. Entries expire after a week so
+    # prompt/model changes eventually take effect even without clearing the file.
+    DISK_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".jarvis", "parse_cache.db")
+    DISK_CACHE_TTL_SECONDS = 7 * 24 * 3600
+    MEMORY_CACHE_MAX = 512
+    # In-memory entries are dropped after an hour, the same as re-reading them from the disk cache.
+    MEMORY_CACHE_TTL_SECONDS = 3600
+
+    # Words that mean "open X"/"close X" is not about an app (files, web pages, popular sites);
+    # those commands skip the fast path and go to the LLM.
+    _NON_APP_WORDS = frozenset((
+        "file", "folder", "directory", "document", "spreadsheet", "website", "site", "page",
+        "url", "link", "tab", "window", "windows", "my", "the", "a", "it", "this", "that",
+        "google", "youtube", "gmail", "facebook", "netflix", "twitter", "reddit", "wikipedia",
+    ))
+
+    # prefix_parse() confidence for an interim transcript matched by a fast rule that more speech could
+    # still change: "play" may become "play despacito on spotify", "open chr" "open chrome".
+    PARTIAL_MATCH_CONFIDENCE = 0.5
+
+    # Entities whose letter case matters (paths, URLs, typed text, shell commands). A parse containing any
+    # of them is cached under the command with the user's letter case kept (see _cased), so
+    # "create Notes.txt" and "create notes.txt" don't share an entry.
+    _CASE_SENSITIVE_ENTITIES = frozenset((
+        "filepath", "content", "dir_path", "path", "source_path", "destination_path", "command_str",
+        "url", "text_to_summarize", "source_url", "site_url", "username", "data_to_store",
+    ))
+
+    # Politeness/wake-word fillers that don't change the meaning of a command. Stripping them
+    # lets "please pause spotify", "jarvis, pause spotify" and "pause spotify" share one cache entry.
+    _LEADING_FILLER_RE = re.compile(r"^(?:(?:hey|ok|okay)\s+)?(?:jarvis\b[,\s]*|(?:please|kindly|can you|could you|would you|will you)\b[,\s]*)")
+    _TRAILING_FILLER_RE = re.compile(r"[,\s]*\b(?:please|for me)[.!?]*$")
+    _WHITESPACE_RE = re.compile(r"\s+")
+
+    # Input limits applied before any LLM call. Speech recognition returns empty or near-empty text
+    # on background noise, and huge pastes only waste tokens.
+    MIN_COMMAND_CHARS = 2
+    MAX_COMMAND_CHARS = 2000
+    _HAS_WORD_CHAR_RE = re.compile(r"[^\W_]") # Any letter or digit, in any script (e.g. Hebrew)
+
     def __init__(self):
         self.logger = get_logger(self.__class__.__name__)
         if not GEMINI_API_KEY or GEMINI_API_KEY == "YOUR_GEMINI_API_KEY":
             self.logger.error("Gemini API key not configured in config.py")
             raise ValueError("Gemini API key not configured. Please set it in config.py")
 
-        genai.configure(api_key=GEMINI_API_KEY)
-        # Specifying JSON mode if available and appropriate for the model
-        # For 'gemini-pro', direct JSON mode is not explicitly listed in basic docs,
-        # but we can instruct it to output JSON via prompt.
-        # If using a model version that explicitly supports JSON output type, that's better.
-        # For now, we'll use prompt engineering for JSON.
-        self.model = genai.GenerativeModel('models/gemini-1.5-flash')
-        self.logger.info("CommandParser initialized with Gemini model models/gemini-1.5-flash.")
-
-    def _build_prompt(self, text_command: str) -> str:
-        # This prompt needs to be carefully crafted and tested.
-        # It instructs the LLM to return a JSON object.
-        prompt = f"""
-Analyze the following user command and extract the primary intent and relevant entities.
-Your response MUST be a single valid JSON object. Do not include any text before or after the JSON object.
-
-The JSON object should have two main keys: "intent" and "entities".
-
-"intent" should be a string from the following list (or "unknown" if not applicable):
-  - "create_file"  # Generic file creation, entities will specify type (txt, doc, sheet)
-  - "create_directory"
-  - "delete_path"
-  - "move_path"
-  - "list_directory_contents"
-  - "execute_command"
-  - "set_brightness"
-  - "set_volume"
-  - "open_app"
-  - "close_app"
-  - "open_website"
-  - "search_info"
-  - "summarize_text" # New intent for summarizing provided text or web page content
-  - "media_play"
-  - "media_pause"
-  - "media_skip"
-  - "media_previous" # Can also be "rewind" or "go back"
-  - "fill_web_form" # For Phase 2
-  - "simulate_online_purchase" # For Phase 2 (simulation only)
-  - "general_query" (for things like "what time is it?" or "tell me a joke")
-  - "store_auth_info" # For security manager interaction
-  - "get_auth_info" # For security manager interaction
-  - "exit"
-
-"entities" should be a JSON object containing relevant extracted information. Examples:
-  - For "create_file": {{"filepath": "path/to/file.ext", "content": "optional file content here", "file_type": "txt/document/spreadsheet"}} (default file_type to "txt" if not clear)
-  - For "create_directory": {{"dir_path": "path/to/directory"}}
-  - For "delete_path": {{"path": "path/to/delete"}}
-  - For "move_path": {{"source_path": "path/to/source", "destination_path": "path/to/destination"}}
-  - For "list_directory_contents": {{"dir_path": "path/to/list"}}
-  - For "execute_command": {{"command_str": "the command to run (can be multi-line)", "shell_type": "cmd/powershell/bash/sh/zsh"}} (default shell_type appropriately by OS if not specified)
-  - For "set_brightness": {{"level": 75}} (integer 0-100, e.g., "set brightness to 75%", "dim screen to 20")
-  - For "set_volume": {{"level": 0.5}} (float 0.0-1.0, e.g. "set volume to 50%" means level 0.5, "mute" means level 0.0, "max volume" means 1.0)
-  - For "open_app": {{"app_name": "application name or path"}}
-  - For "close_app": {{"app_name": "application name or process name"}}
-  - For "open_website": {{"url": "website_url.com (try to make it a full URL like http://...)"}}
-  - For "search_info": {{"query": "search query", "summarize": true/false}} (default summarize to false; if true, the main app will call summarize_text after search)
-  - For "summarize_text": {{"text_to_summarize": "long text here", "source_url": "optional_url_if_text_is_from_webpage"}}
-  - For "media_play": {{"player_name": "spotify/apple music/native/default etc.", "track_or_playlist": "optional track/playlist name"}}
-  - For "media_pause": {{"player_name": "spotify/apple music/native/default etc."}}
-  - For "media_skip": {{"player_name": "spotify/apple music/native/default etc."}} (for "next track")
-  - For "media_previous": {{"player_name": "spotify/apple music/native/default etc."}} (for "previous track" or "rewind")
-  - For "fill_web_form": {{"url": "target_url", "form_type_identifier": "e.g., generic_registration, specific_site_login", "data_profile_key": "key_for_security_manager_data"}}
-  - For "simulate_online_purchase": {{"item_description": "item to search for", "site_url": "optional_target_site", "dummy_data_profile_key": "key_for_security_manager_test_data"}}
-  - For "general_query": {{"query_text": "full user query"}}
-  - For "store_auth_info": {{"service_name": "service identifier", "username": "user's name for the service", "data_to_store": "the sensitive data/password"}}
-  - For "get_auth_info": {{"service_name": "service identifier", "username": "user's name for the service"}}
-  - For "exit": {{}}
-
-General Instructions for Entity Extraction:
-- File Paths: If a user says "my documents" or "desktop", try to map these to standard user directory paths. If a path is relative, keep it relative unless easily resolvable to an absolute one. For file creation, try to infer the file extension if not explicitly given but a file type (document, spreadsheet) is mentioned.
-- Application Names: Be flexible. "Word" could be "Microsoft Word".
-- URLs: If a user says "google.com", convert to "http://google.com" or "https://google.com".
-- Percentages: For brightness/volume, convert "75 percent" or "half" to the numerical target format.
-- Complex Commands: For "execute_command", the "command_str" can contain newlines if the user dictates a multi-line script.
-- Summarization: If the user asks to search AND summarize, the intent should be "search_info" with "summarize": true. The main application flow will then handle getting the content and calling a "summarize_text" action. If the user provides text directly or points to a page to summarize, use "summarize_text".
-- Media Player: If no player is specified, use a sensible default like "default" or "native". "Rewind" can map to "media_previous" or a specific player's rewind function if that level of detail is later supported.
-
-User command: "{text_command}"
-
-JSON Response:
-"""
-        return prompt
+        # The Gemini model handles (self.model, self._model_fast) are created on first use, so commands
+        # resolved locally (fast-path rules, caches) never pay for SDK configuration or model setup.
+        # Built once and reused for every request. JSON mode: the model is constrained to emit JSON matching SCHEMA.
+        self._gen_config = genai.types.GenerationConfig(
+            temperature=0.1, # Lower temperature for more deterministic output
+            response_mime_type="application/json",
+            response_schema=self.SCHEMA
+        )
+        # Same, for parse_commands_bulk: an array with one SCHEMA object per command.
+        self._bulk_gen_config = genai.types.GenerationConfig(
+            temperature=0.1,
+            response_mime_type="application/json",
+            response_schema={"type": "array", "items": self.SCHEMA}
+        )
+        self.logger.info("CommandParser initialized (Gemini models models/gemini-1.5-flash and models/gemini-1.5-flash-8b load on first use).")
+
+        # Cache of parsed commands keyed by normalized command text, case kept for parses with paths/URLs
+        # (see _cache_put); a memory LRU in front of a SQLite file.
+        # With temperature=0.1 the model output is near-deterministic, so repeated commands
+        # ("pause spotify", "exit") can skip the network round-trip entirely. The instructions are the
+        # namespace, so editing them invalidates old entries. JARVIS_LLM_CACHE=0 bypasses it.
+        self._cache = LLMCache(
+            self.DISK_CACHE_PATH, namespace=self._SYSTEM_INSTRUCTION, ttl_seconds=self.DISK_CACHE_TTL_SECONDS,
+            memory_max=self.MEMORY_CACHE_MAX, memory_ttl_seconds=self.MEMORY_CACHE_TTL_SECONDS
+        )
+        # Generalizes parses over their entity slots ("open chrome" -> "open <app_name:1>"), so a command
+        # that differs from an earlier one only in the app/path/URL/level is also resolved without the LLM.
+        self._templates = TemplateCache()
+        self._last_llm_call = 0.0 # time.monotonic() of the latest API request, see keep_warm()
+        self._keep_warm_started = False
+
+        # Rule-based fast path for short, unambiguous commands. These are matched, ignoring case, against the
+        # normalized command with the user's letter case kept (see _cased), so paths keep their case; on a
+        # miss the command goes to Gemini as usual.
+        # Optional trailing player, e.g. "pause spotify" / "next track on spotify". Limited to known
+        # player names so that "play despacito" is not mistaken for a player and goes to the LLM.
+        player = r"(?:\s+(?:on\s+|in\s+)?(spotify|apple music|music|itunes|vlc|default|native))?"
+        self._fast_rules = [
+            (re.compile(r"^(?:exit|quit)(?:\s+jarvis)?$", re.IGNORECASE),
+             lambda m: {"intent": "exit", "entities": {}}),
+            (re.compile(r"^pause(?:\s+(?:the\s+)?(?:music|song|playback))?" + player + "$", re.IGNORECASE),
+             lambda m: {"intent": "media_pause", "entities": {"player_name": (m.group(1) or "default").lower()}}),
+            (re.compile(r"^(?:resume|play)(?:\s+(?:the\s+)?music)?" + player + "$", re.IGNORECASE),
+             lambda m: {"intent": "media_play", "entities": {"player_name": (m.group(1) or "default").lower()}}),
+            (re.compile(r"^(?:next|skip)(?:\s+(?:the\s+)?(?:song|track))?" + player + "$", re.IGNORECASE),
+             lambda m: {"intent": "media_skip", "entities": {"player_name": (m.group(1) or "default").lower()}}),
+            (re.compile(r"^(?:previous|rewind|go back)(?:\s+(?:the\s+)?(?:song|track))?" + player + "$", re.IGNORECASE),
+             lambda m: {"intent": "media_previous", "entities": {"player_name": (m.group(1) or "default").lower()}}),
+            # "open chrome" / "close notepad". Rules may return None to defer to the LLM, see _app_name_rule.
+            (re.compile(r"^(?:open|launch)\s+([a-z0-9][a-z0-9 +\-]{0,30})$", re.IGNORECASE),
+             lambda m: self._app_name_rule("open_app", m.group(1))),
+            (re.compile(r"^close\s+([a-z0-9][a-z0-9 +\-]{0,30})$", re.IGNORECASE),
+             lambda m: self._app_name_rule("close_app", m.group(1))),
+            # "list contents of Downloads" / "list files in Projects/Jarvis"; the path keeps its case
+            (re.compile(r"^list\s+(?:the\s+)?(?:contents\s+of|files\s+in)\s+(?!my\b)([\w\-./\\ ]{1,100})$", re.IGNORECASE),
+             lambda m: {"intent": "list_directory_contents", "entities": {"dir_path": m.group(1)}}),
+        ]
+
+    def _app_name_rule(self, intent: str, app_name: str) -> dict | None:
+        """Fast-path result for open/close app commands, or None if the target doesn't look like an app name."""
+        app_name = app_name.lower()
+        if self._NON_APP_WORDS.intersection(app_name.split()):
+            return None
+        return {"intent": intent, "entities": {"app_name": app_name}}
+
+    @functools.cached_property
+    def model(self):
+        # Gemini 1.5 Flash supports native JSON mode (response_mime_type + response_schema),
+        # see self._gen_config and SCHEMA.
+        _configure_genai()
+        self.logger.info("Loading Gemini model models/gemini-1.5-flash.")
+        return genai.GenerativeModel('models/gemini-1.5-flash', system_instruction=self._SYSTEM_INSTRUCTION)
+
+    @functools.cached_property
+    def _model_fast(self):
+        # Smaller, faster model tried first for short single-clause commands (see _is_simple_command).
+        # Anything it can't resolve falls back to self.model.
+        _configure_genai()
+        self.logger.info("Loading Gemini model models/gemini-1.5-flash-8b.")
+        return genai.GenerativeModel('models/gemini-1.5-flash-8b', system_instruction=self._SYSTEM_INSTRUCTION)
+
+    def _normalize(self, text_command: str) -> str:
+        """
+        Lower-cases the command, collapses whitespace and strips leading/trailing filler words,
+        so near-duplicate phrasings map to the same fast-path rule and cache keys.
+        """
+        normalized_text = self._WHITESPACE_RE.sub(" ", text_command.strip().lower())
+        if len(normalized_text) > self.MAX_COMMAND_CHARS:
+            self.logger.warning("Command is %d characters long, truncating to %d.", len(normalized_text), self.MAX_COMMAND_CHARS)
+            normalized_text = normalized_text[:self.MAX_COMMAND_CHARS]
+        while True:
+            stripped = self._TRAILING_FILLER_RE.sub("", self._LEADING_FILLER_RE.sub("", normalized_text))
+            if stripped == normalized_text or not stripped:
+                return normalized_text
+            normalized_text = stripped
+
+    def _reject_non_command(self, normalized_text: str) -> dict | None:
+        """Returns an 'unknown' result for input that can't be a command (empty, punctuation only), otherwise None."""
+        if len(normalized_text) < self.MIN_COMMAND_CHARS:
+            self.logger.info("Ignoring empty or too short command: '%s'", normalized_text)
+            return {"intent": "unknown", "entities": {"error": "empty"}}
+        if not self._HAS_WORD_CHAR_RE.search(normalized_text):
+            self.logger.info("Ignoring command without letters or digits: '%s'", normalized_text)
+            return {"intent": "unknown", "entities": {"error": "no_text"}}
+        return None
+
+    def _cache_get(self, normalized_text: str, text_command: str) -> dict | None:
+        """
+        Looks the command up in the parse cache, then in the template cache (same command shape with a
+        different app/path/URL/level). Returns a copy the caller may mutate.
+        """
+        cased_text = self._cased(normalized_text, text_command)
+        cached_result = self._cache.get(normalized_text)
+        if cached_result is not None and cased_text != normalized_text and self._is_case_sensitive(cached_result):
+            cached_result = None # Learned from the lower-case form of this command, whose paths/URLs differ
+        if cached_result is None and cased_text != normalized_text:
+            cached_result = self._cache.get(cased_text)
+        if cached_result is not None or not self._cache.enabled:
+            return cached_result
+        templated_result = self._templates.match(normalized_text, original_text=text_command)
+        if templated_result and templated_result["intent"] in ("open_app", "close_app"):
+            # Same check as the fast-path rules: "open the file ..." is not an app
+            templated_result = self._app_name_rule(templated_result["intent"], templated_result["entities"]["app_name"])
+        return templated_result
+
+    def _is_case_sensitive(self, parsed_command: dict) -> bool:
+        """True if any action of the parse has an entity whose letter case matters."""
+        for action in parsed_command.get("actions") or [parsed_command]:
+            entities = action.get("entities")
+            if isinstance(entities, dict) and self._CASE_SENSITIVE_ENTITIES.intersection(entities):
+                return True
+        return False
+
+    def _cache_put(self, normalized_text: str, parsed_command: dict, text_command: str):
+        """Stores a successful parse. 'unknown' results are not cached so they are retried next time."""
+        if parsed_command.get("intent") == "unknown":
+            return
+        cache_key = self._cased(normalized_text, text_command) if self._is_case_sensitive(parsed_command) else normalized_text
+        self._cache.set(cache_key, parsed_command)
+        if self._cache.enabled:
+            self._templates.learn(normalized_text, parsed_command)
+
+    def revise_template(self, text_command: str) -> bool:
+        """
+        Call when the user reports that a command was misunderstood: drops the cached parse and any
+        learned template that matched it, so the command goes back to the LLM next time.
+        """
+        normalized_text = self._normalize(text_command)
+        self._cache.evict(normalized_text)
+        cased_text = self._cased(normalized_text, text_command)
+        if cased_text != normalized_text:
+            self._cache.evict(cased_text)
+        return self._templates.revise_template(normalized_text)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _build_prompt(text_command: str) -> str:
+        # Only the per-command tail; the static instructions are the models' system_instruction.
+        # Static so the memoization (shared by the sync, async, streaming and fallback paths) doesn't hold on to `self`.
+        # Quotes in the command are escaped so they can't close the Command: "..." framing early.
+        return CommandParser._PROMPT_PREFIX + text_command.replace('"', '\\"') + CommandParser._PROMPT_SUFFIX
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff for the given (1-based) attempt, plus random jitter."""
+        delay = min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+        return delay + random.uniform(0, self.BACKOFF_BASE_SECONDS)
+
+    def _generate_with_retry(self, prompt: str, model=None, generation_config=None, **kwargs):
+        """Calls generate_content on `model` (default: the full model) with a per-request timeout, retrying transient errors."""
+        model = model or self.model
+        self._last_llm_call = time.monotonic()
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                return model.generate_content(
+                    prompt,
+                    generation_config=generation_config or self._gen_config,
+                    request_options={"timeout": self.REQUEST_TIMEOUT_SECONDS},
+                    **kwargs
+                )
+            except self._RETRYABLE_ERRORS as e:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                delay = self._backoff_delay(attempt)
+                self.logger.warning("Transient LLM error (attempt %d/%d): %s. Retrying in %.2fs.", attempt, self.MAX_ATTEMPTS, e, delay)
+                time.sleep(delay)
+
+    async def _generate_with_retry_async(self, prompt: str, model=None):
+        """Async counterpart of _generate_with_retry."""
+        model = model or self.model
+        self._last_llm_call = time.monotonic()
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                return await model.generate_content_async(
+                    prompt,
+                    generation_config=self._gen_config,
+                    request_options={"timeout": self.REQUEST_TIMEOUT_SECONDS}
+                )
+            except self._RETRYABLE_ERRORS as e:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                delay = self._backoff_delay(attempt)
+                self.logger.warning("Transient LLM error (attempt %d/%d): %s. Retrying in %.2fs.", attempt, self.MAX_ATTEMPTS, e, delay)
+                await asyncio.sleep(delay)
+
+    def warmup(self):
+        """
+        Sets up both models and opens the connection to the Gemini API with a count_tokens request
+        (nothing is generated), so the first parse doesn't pay for SDK setup and the TLS handshake.
+        Failures are only logged; a real request will report them.
+        """
+        self._last_llm_call = time.monotonic()
+        try:
+            self._model_fast
+            self.model.count_tokens("ping", request_options={"timeout": self.REQUEST_TIMEOUT_SECONDS})
+            self.logger.debug("Gemini connection warmed up.")
+        except Exception as e:
+            self.logger.warning("Gemini warm-up failed: %s", e)
+
+    def keep_warm(self):
+        """
+        Calls warmup() on a daemon thread, then again whenever no request has been made for
+        KEEP_WARM_INTERVAL_SECONDS, so a command after a pause doesn't start on a closed connection.
+        Only the first call starts the thread.
+        """
+        if self._keep_warm_started:
+            return
+        self._keep_warm_started = True
+
+        def run():
+            while True:
+                idle = time.monotonic() - self._last_llm_call
+                if idle >= self.KEEP_WARM_INTERVAL_SECONDS:
+                    self.warmup()
+                    idle = 0
+                time.sleep(self.KEEP_WARM_INTERVAL_SECONDS - idle)
+
+        threading.Thread(target=run, name="GeminiKeepWarm", daemon=True).start()
+
+    def _is_simple_command(self, normalized_text: str) -> bool:
+        """True if the command is short and single-clause enough to try the fast model first."""
+        return len(normalized_text) < self.FAST_MODEL_MAX_CHARS and not self._COMPLEX_COMMAND_RE.search(normalized_text)
+
+    def _needs_full_model(self, parsed_command: dict) -> bool:
+        """True if the fast model's parsed response is unusable (invalid JSON or intent 'unknown' both parse to 'unknown')."""
+        return parsed_command.get("intent", "unknown") == "unknown"
+
+    def _llm_text(self, text_command: str) -> str:
+        """
+        The command as sent to the LLM: the user's original text, only trimmed and length-limited.
+        The normalized form is just a lookup key; lower-casing and filler stripping would alter file
+        names, typed content, URLs and shell commands.
+        """
+        return text_command.strip()[:self.MAX_COMMAND_CHARS]
+
+    def _call_llm(self, text_command: str, normalized_text: str) -> dict:
+        """
+        Sends the prompt for the command to the LLM and returns the parsed response.
+        `normalized_text` only decides whether the fast model is tried first.
+        """
+        prompt = self._build_prompt(self._llm_text(text_command))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Generated prompt for LLM: %s", prompt)
+        if self._is_simple_command(normalized_text):
+            try:
+                parsed_command = self._parse_llm_response(self._generate_with_retry(prompt, model=self._model_fast).text)
+                if not self._needs_full_model(parsed_command):
+                    return parsed_command
+                self.logger.info("Fast model could not resolve '%s', falling back to the full model.", normalized_text)
+            except Exception as e:
+                self.logger.warning("Fast model failed for '%s', falling back to the full model: %s", normalized_text, e)
+        response = self._generate_with_retry(prompt)
+        return self._parse_llm_response(response.text)
+
+    def _decode_json(self, raw_response_text: str):
+        """
+        Decodes the LLM response, trying progressively more lenient stages:
+        1. the response as-is (the normal case in JSON mode),
+        2. the outermost {...} block, for responses wrapped in prose or markdown fences,
+        3. that block with smart quotes and raw line breaks cleaned up.
+        Returns None if every stage fails.
+        """
+        try:
+            return _json_loads(raw_response_text)
+        except ValueError as je: # json.JSONDecodeError and orjson.JSONDecodeError both subclass ValueError
+            self.logger.warning("Direct JSON decode failed: %s. Trying to extract a JSON block.", je)
+
+        match = self._JSON_BLOCK_RE.search(raw_response_text)
+        if match:
+            candidate = match.group(0)
+            try:
+                parsed_json = _json_loads(candidate)
+                self.logger.info("Recovered LLM response via JSON block extraction.")
+                return parsed_json
+            except ValueError:
+                pass
+
+            # Raw newlines inside string values are invalid JSON; between tokens a space is equivalent.
+            cleaned = candidate.translate(self._SMART_QUOTES).replace("\r", " ").replace("\n", " ")
+            try:
+                parsed_json = _json_loads(cleaned)
+                self.logger.info("Recovered LLM response via JSON block extraction after cleanup.")
+                return parsed_json
+            except ValueError:
+                pass
+
+        self.logger.error("Failed to decode LLM response as JSON. Response was: %s", raw_response_text)
+        return None
+
+    def _parse_llm_response(self, raw_response_text: str) -> dict:
+        """Parses a raw LLM response into the intent/entities dictionary."""
+        self.logger.info("Raw LLM response: %s", raw_response_text)
+        parsed_json = self._decode_json(raw_response_text)
+        if parsed_json is None:
+            return {"intent": "unknown", "entities": {"error": "LLM response was not valid JSON.", "raw_response": raw_response_text}}
+        return self._validate_parsed(parsed_json)
+
+    def _validate_parsed(self, parsed_json) -> dict:
+        """Checks a decoded LLM result has the intent/entities structure, returning 'unknown' otherwise."""
+        if not isinstance(parsed_json, dict):
+            self.logger.warning("LLM response is not a JSON object: %s", parsed_json)
+            return {"intent": "unknown", "entities": {"error": "Malformed JSON structure from LLM."}}
+
+        if "intent" not in parsed_json or "entities" not in parsed_json:
+            self.logger.warning("LLM response missing 'intent' or 'entities': %s", parsed_json)
+            return {"intent": "unknown", "entities": {"error": "Malformed JSON structure from LLM."}}
+
+        actions = parsed_json.get("actions")
+        if actions is not None:
+            if not isinstance(actions, list):
+                actions = [actions]
+            valid_actions = [action for action in actions if isinstance(action, dict) and "intent" in action and "entities" in action]
+            if len(valid_actions) < len(actions):
+                self.logger.warning("Dropping malformed entries from LLM 'actions': %s", actions)
+            if len(valid_actions) > 1:
+                parsed_json["actions"] = valid_actions
+            else: # A single action is just the top-level intent/entities
+                del parsed_json["actions"]
+
+        self.logger.info("Successfully parsed LLM response into JSON: %s", parsed_json)
+        return parsed_json
+
+    def _cased(self, normalized_text: str, text_command: str) -> str:
+        """
+        normalized_text with the letter case of the original command restored, e.g. "list files in Downloads"
+        rather than "list files in downloads". Returns normalized_text if the two can't be lined up.
+        """
+        collapsed = self._WHITESPACE_RE.sub(" ", text_command.strip())[:self.MAX_COMMAND_CHARS]
+        lowered = collapsed.lower()
+        start = lowered.find(normalized_text)
+        if start < 0 or len(lowered) != len(collapsed): # Some characters change length when lower-cased
+            return normalized_text
+        return collapsed[start:start + len(normalized_text)]
+
+    def _match_fast_rules(self, normalized_text: str, text_command: str | None = None) -> dict | None:
+        """Returns the parsed command if a fast-path rule matches, otherwise None."""
+        if text_command is not None:
+            normalized_text = self._cased(normalized_text, text_command)
+        # Ignore trailing punctuation that speech recognition or typing may add ("pause.", "exit!")
+        candidate = normalized_text.rstrip(".!?")
+        for pattern, build in self._fast_rules:
+            match = pattern.match(candidate)
+            if match:
+                parsed_command = build(match)
+                if parsed_command is None: # The rule declined this text, let the LLM handle it
+                    return None
+                self.logger.info("Fast-path rule matched '%s': %s", normalized_text, parsed_command)
+                return parsed_command
+        return None
+
+    def prefix_parse(self, partial_text: str) -> tuple[str, float, dict] | None:
+        """
+        Local-only parse of a partial (interim) speech transcript, so a command can be acted on before
+        recognition finalizes. Returns (intent, confidence, entities) when a fast-path rule matches,
+        otherwise None and the caller waits for the final transcript. Never calls the LLM.
+        Confidence is 1.0 only for results further words can't change ("exit", or a media control naming
+        its player); other matches may be the prefix of a longer command and get PARTIAL_MATCH_CONFIDENCE.
+        """
+        normalized_text = self._normalize(partial_text)
+        if self._reject_non_command(normalized_text):
+            return None
+        fast_result = self._match_fast_rules(normalized_text, partial_text)
+        if not fast_result:
+            return None
+        intent, entities = fast_result["intent"], fast_result["entities"]
+        complete = intent == "exit" or (intent.startswith("media_") and entities.get("player_name", "default") != "default")
+        return intent, 1.0 if complete else self.PARTIAL_MATCH_CONFIDENCE, entities
 
     def parse_command(self, text_command: str) -> dict:
         """
         Uses the LLM to understand the user's command and returns a structured dictionary.
+        Simple commands are resolved by local fast-path rules, and identical commands
+        (after normalization) are served from the persistent parse cache or an in-process LRU cache.
+        The LLM itself always sees the command as the user gave it.
         """
-        prompt = self._build_prompt(text_command)
-        self.logger.debug(f"Generated prompt for LLM: {prompt}")
+        normalized_text = self._normalize(text_command)
+        rejected = self._reject_non_command(normalized_text)
+        if rejected:
+            return rejected
+
+        fast_result = self._match_fast_rules(normalized_text, text_command)
+        if fast_result:
+            return fast_result
+
+        cached_result = self._cache_get(normalized_text, text_command)
+        if cached_result:
+            return cached_result
 
         try:
-            # Configuration for Gemini to encourage JSON output (though not strictly enforcing via API param here)
-            generation_config = genai.types.GenerationConfig(
-                # response_mime_type="application/json", # Not available for gemini-pro directly this way
-                temperature=0.1 # Lower temperature for more deterministic JSON structure
-            )
-            response = self.model.generate_content(
-                prompt,
-                generation_config=generation_config
-            )
-
-            raw_response_text = response.text
-            self.logger.info(f"Raw LLM response: {raw_response_text}")
-
-            # Clean the response: LLMs sometimes wrap JSON in ```json ... ```
-            cleaned_response_text = raw_response_text.strip()
-            if cleaned_response_text.startswith("```json"):
-                cleaned_response_text = cleaned_response_text[7:]
-            if cleaned_response_text.endswith("```"):
-                cleaned_response_text = cleaned_response_text[:-3]
-            cleaned_response_text = cleaned_response_text.strip()
-
-            # Attempt to parse the cleaned text as JSON
-            parsed_json = json.loads(cleaned_response_text)
-
-            if "intent" not in parsed_json or "entities" not in parsed_json:
-                self.logger.warning(f"LLM response missing 'intent' or 'entities': {parsed_json}")
-                return {"intent": "unknown", "entities": {"error": "Malformed JSON structure from LLM."}}
-
-            self.logger.info(f"Successfully parsed LLM response into JSON: {parsed_json}")
-            return parsed_json
-
-        except json.JSONDecodeError as je:
-            self.logger.error(f"Failed to decode LLM response as JSON. Error: {je}. Response was: {raw_response_text}")
-            return {"intent": "unknown", "entities": {"error": "LLM response was not valid JSON.", "raw_response": raw_response_text}}
+            parsed_command = self._call_llm(text_command, normalized_text)
+        except Exception as e:
+            self.logger.error("Error parsing command with LLM: %s", e, exc_info=True)
+            return {"intent": "unknown", "entities": {"error": f"An unexpected error occurred: {str(e)}"}}
+
+        self._cache_put(normalized_text, parsed_command, text_command)
+        return parsed_command
+
+    def parse_commands_bulk(self, texts: list[str]) -> list[dict]:
+        """
+        Parses a list of independent commands with a single LLM request (one round-trip for the whole list),
+        for offline work such as evaluation runs or replaying a macro. Commands resolved locally
+        (rejected input, fast-path rules, parse cache) are not sent. If the model's answer doesn't line up
+        with the commands sent, those commands are parsed one by one instead.
+        Results are returned in the same order as `texts`.
+        """
+        results = [None] * len(texts)
+        pending = [] # (index, normalized_text) of commands that need the LLM
+        for i, text in enumerate(texts):
+            normalized_text = self._normalize(text)
+            results[i] = (self._reject_non_command(normalized_text) or self._match_fast_rules(normalized_text, text)
+                          or self._cache_get(normalized_text, text))
+            if results[i] is None:
+                pending.append((i, normalized_text))
+        if not pending:
+            return results
+
+        prompt = "Parse each command separately; answer with one object per command, in order.\n" + "\n".join(
+            f"{n}. {self._build_prompt(self._llm_text(texts[i])).strip()}" for n, (i, _) in enumerate(pending, 1)
+        )
+        parsed_list = None
+        try:
+            response = self._generate_with_retry(prompt, generation_config=self._bulk_gen_config)
+            parsed_list = self._decode_json(response.text)
+        except Exception as e:
+            self.logger.error("Bulk parsing request failed: %s", e, exc_info=True)
+
+        if not isinstance(parsed_list, list) or len(parsed_list) != len(pending):
+            self.logger.warning("Bulk parse did not return %d results, parsing commands individually.", len(pending))
+            for i, _ in pending:
+                results[i] = self.parse_command(texts[i])
+            return results
+
+        for (i, normalized_text), parsed_json in zip(pending, parsed_list):
+            results[i] = self._validate_parsed(parsed_json)
+            self._cache_put(normalized_text, results[i], texts[i])
+        return results
+
+    def parse_command_stream(self, text_command: str):
+        """
+        Streaming version of parse_command. Yields (is_final, parsed_command) tuples:
+        early (False, {"intent": ..., "entities": {...}}) hints as soon as the intent has streamed in,
+        so the caller can start side work (e.g. warming up a media player), followed by exactly one
+        (True, parsed_command) with the complete result. Rejected input, fast-path and cache hits yield only the final result.
+        With jiter installed, a new hint is yielded each time another entity value completes;
+        otherwise a single hint with empty entities is yielded once the intent is known.
+        """
+        normalized_text = self._normalize(text_command)
+        cached_result = (self._reject_non_command(normalized_text) or self._match_fast_rules(normalized_text, text_command)
+                         or self._cache_get(normalized_text, text_command))
+        if cached_result:
+            yield True, cached_result
+            return
+
+        prompt = self._build_prompt(self._llm_text(text_command))
+        buffer = ""
+        last_hint = None
+        try:
+            response = self._generate_with_retry(prompt, stream=True)
+            for chunk in response:
+                buffer += chunk.text
+                hint = self._partial_parse(buffer)
+                if hint and hint != last_hint:
+                    last_hint = hint
+                    self.logger.debug("Partial parse while streaming '%s': %s", normalized_text, hint)
+                    yield False, hint
+        except Exception as e:
+            self.logger.error("Error parsing command '%s' with LLM (stream): %s", text_command, e, exc_info=True)
+            yield True, {"intent": "unknown", "entities": {"error": f"An unexpected error occurred: {str(e)}"}}
+            return
+
+        parsed_command = self._parse_llm_response(buffer)
+        self._cache_put(normalized_text, parsed_command, text_command)
+        yield True, parsed_command
+
+    def _partial_parse(self, buffer: str) -> dict | None:
+        """Returns the intent and completed entities found so far in a partial JSON response, or None if the intent isn't known yet."""
+        if jiter is None:
+            match = self._STREAM_INTENT_RE.search(buffer)
+            if match and match.group(1) in self.INTENTS:
+                return {"intent": match.group(1), "entities": {}}
+            return None
+        try:
+            # partial_mode=True drops incomplete trailing strings, so only finished values are reported
+            partial = jiter.from_json(buffer.encode("utf-8"), partial_mode=True)
+        except ValueError:
+            return None
+        if not isinstance(partial, dict) or partial.get("intent") not in self.INTENTS:
+            return None
+        entities = partial.get("entities")
+        return {"intent": partial["intent"], "entities": dict(entities) if isinstance(entities, dict) else {}}
+
+    async def parse_command_async(self, text_command: str) -> dict:
+        """
+        Async version of parse_command; the preferred entry point for any caller running inside an event loop.
+        Independent commands can be awaited together (asyncio.gather) so their network latency overlaps.
+        Uses the SDK's native async client so the 1-3 s LLM round-trip doesn't block the loop. Falls back to
+        running the sync parse_command in a worker thread if the installed SDK has no async support.
+        """
+        if not hasattr(self.model, "generate_content_async"):
+            return await asyncio.to_thread(self.parse_command, text_command)
+        return await self._parse_one_async(text_command)
+
+    async def _parse_one_async(self, text_command: str, semaphore: asyncio.Semaphore | None = None) -> dict:
+        """Async counterpart of parse_command for a single command, optionally bounded by a shared semaphore."""
+        normalized_text = self._normalize(text_command)
+        rejected = self._reject_non_command(normalized_text)
+        if rejected:
+            return rejected
+        fast_result = self._match_fast_rules(normalized_text, text_command)
+        if fast_result:
+            return fast_result
+        cached_result = self._cache_get(normalized_text, text_command)
+        if cached_result:
+            return cached_result
+
+        prompt = self._build_prompt(self._llm_text(text_command))
+        parsed_command = None
+        try:
+            async with semaphore or contextlib.nullcontext():
+                if self._is_simple_command(normalized_text):
+                    try:
+                        parsed_command = self._parse_llm_response((await self._generate_with_retry_async(prompt, model=self._model_fast)).text)
+                        if self._needs_full_model(parsed_command):
+                            self.logger.info("Fast model could not resolve '%s', falling back to the full model.", normalized_text)
+                            parsed_command = None
+                    except Exception as e:
+                        self.logger.warning("Fast model failed for '%s', falling back to the full model: %s", normalized_text, e)
+                if parsed_command is None:
+                    parsed_command = self._parse_llm_response((await self._generate_with_retry_async(prompt)).text)
         except Exception as e:
-            self.logger.error(f"Error parsing command with LLM: {e}", exc_info=True)
+            self.logger.error("Error parsing command '%s' with LLM (async): %s", text_command, e, exc_info=True)
             return {"intent": "unknown", "entities": {"error": f"An unexpected error occurred: {str(e)}"}}
+        self._cache_put(normalized_text, parsed_command, text_command)
+        return parsed_command
+
+    async def parse_commands_batch(self, texts: list[str], max_in_flight: int = 8) -> list[dict]:
+        """
+        Parses several commands concurrently, so total latency is roughly that of the slowest
+        request instead of the sum of all round-trips.
+        At most `max_in_flight` requests are sent at once to stay within Gemini rate limits.
+        Results are returned in the same order as `texts`.
+        """
+        semaphore = asyncio.Semaphore(max_in_flight)
+        results = await asyncio.gather(
+            *[self._parse_one_async(text, semaphore) for text in texts],
+            return_exceptions=True
+        )
+        parsed_commands = []
+        for text, result in zip(texts, results):
+            if isinstance(result, BaseException):
+                self.logger.error("Batch parsing failed for '%s': %s", text, result)
+                result = {"intent": "unknown", "entities": {"error": f"An unexpected error occurred: {str(result)}"}}
+            parsed_commands.append(result)
+        return parsed_commands
 
 if __name__ == '__main__':
     # Ensure config.py has a valid API key for this test to run
@@ -155,7 +814,34 @@ if __name__ == '__main__':
     # Example: python -m jarvis_assistant.core.command_parser
 
     try:
-        parser = CommandParser()
+        parser = get_parser()
+
+        print("\n--- Testing fast-path rules (no LLM call) ---")
+        # Paths keep the user's letter case; app and player names are case-insensitive
+        assert parser.parse_command("Please list files in Projects/Jarvis") == {"intent": "list_directory_contents", "entities": {"dir_path": "Projects/Jarvis"}}
+        assert parser.parse_command("Open Chrome") == {"intent": "open_app", "entities": {"app_name": "chrome"}}
+        assert parser.parse_command("Pause Spotify.") == {"intent": "media_pause", "entities": {"player_name": "spotify"}}
+        assert parser._match_fast_rules("close all windows") is None # Not an app, goes to the LLM
+        print("Fast-path rules OK.")
+
+        print("\n--- Testing early commit on interim transcripts ---")
+        from jarvis_assistant.main import _listen_with_early_commit
+
+        class _ScriptedRecognizer:
+            def __init__(self, partials, final):
+                self.results = [(text, False) for text in partials] + [(final, True)]
+
+            def stream_listen(self):
+                return iter(self.results)
+
+        # A repeated prefix of a longer command must wait for the final transcript
+        assert _listen_with_early_commit(_ScriptedRecognizer(["play", "play", "play despacito"], "play despacito on spotify"), parser) == ("play despacito on spotify", None)
+        assert _listen_with_early_commit(_ScriptedRecognizer(["open chr", "open chr"], "open chrome"), parser) == ("open chrome", None)
+        # A command no further words can change is committed once two partials agree
+        assert _listen_with_early_commit(_ScriptedRecognizer(["pause spotify", "pause spotify"], "pause spotify"), parser) == (
+            "pause spotify", {"intent": "media_pause", "entities": {"player_name": "spotify"}})
+        print("Early commit OK.")
+
         commands_to_test = [
             "create a document called report.txt with content This is my report.",
             "make a spreadsheet named budget",
@@ -167,6 +853,7 @@ if __name__ == '__main__':
             "increase screen brightness to 90%",
             "set master volume to half",
             "what is the weather like today?", # general_query
+            "pause spotify", # Fast-path rule, no LLM call
             "exit"
         ]
 
@@ -181,6 +868,7 @@ if __name__ == '__main__':
             "set_brightness",
             "set_volume",
             "general_query",
+            "media_pause",
             "exit"
         ]
 
@@ -196,6 +884,37 @@ if __name__ == '__main__':
             else:
                  print(f"WARNING: Intent was 'unknown' for command: {command}")
 
+        print("\n--- Testing streaming parsing ---")
+        for is_final, parsed_output in parser.parse_command_stream("play some jazz on spotify"):
+            print(f"{'Final' if is_final else 'Early hint'}: {parsed_output}")
+
+        print("\n--- Testing bulk parsing (single LLM request) ---")
+        started = time.perf_counter()
+        bulk_results = parser.parse_commands_bulk(commands_to_test)
+        print(f"Parsed {len(bulk_results)} commands in one request in {time.perf_counter() - started:.2f}s")
+        for command, parsed_output, expected in zip(commands_to_test, bulk_results, expected_intents):
+            assert "intent" in parsed_output
+            assert "entities" in parsed_output
+            print(f"'{command}' -> {parsed_output['intent']} (expected {expected})")
+
+        print("\n--- Testing concurrent async parsing ---")
+        async def parse_all_async():
+            # All round-trips overlap, so this takes roughly as long as the slowest command
+            return await asyncio.gather(*[parser.parse_command_async(c) for c in commands_to_test])
+        started = time.perf_counter()
+        async_results = asyncio.run(parse_all_async())
+        print(f"Parsed {len(async_results)} commands concurrently in {time.perf_counter() - started:.2f}s")
+        for command, parsed_output in zip(commands_to_test, async_results):
+            assert "intent" in parsed_output
+            assert "entities" in parsed_output
+            print(f"'{command}' -> {parsed_output['intent']}")
+
+        print("\n--- Testing concurrent batch parsing ---")
+        batch_results = asyncio.run(parser.parse_commands_batch(commands_to_test))
+        for command, parsed_output in zip(commands_to_test, batch_results):
+            assert "intent" in parsed_output
+            assert "entities" in parsed_output
+            print(f"'{command}' -> {parsed_output['intent']}")
 
     except ValueError as ve: # API key error
         print(f"Setup Error: {ve}")
@@ -0,0 +1,382 @@
+# Persistent cache of LLM results (parsed commands), shared across restarts
+import collections
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable
+from jarvis_assistant.utils.logger import get_logger
+
+try:
+    # orjson parses small JSON payloads noticeably faster than the stdlib; optional dependency.
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# Ensure get_logger can be found if this module is run standalone for testing
+if __name__ == '__main__' and __package__ is None:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from jarvis_assistant.utils.logger import get_logger
+
+
+def _has_intent(value) -> bool:
+    return isinstance(value, dict) and "intent" in value
+
+
+class LLMCache:
+    """
+    Two-level cache for LLM results: an in-memory LRU (with a TTL) in front of a SQLite file.
+    Entries are keyed by the SHA-256 of `namespace` + the key text, so changing the namespace (e.g. the
+    prompt the results came from) invalidates old entries. The disk level is best-effort: if the file
+    can't be opened or written, the cache keeps working from memory only.
+    Set the environment variable JARVIS_LLM_CACHE=0 to bypass the cache entirely.
+    """
+    DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".jarvis", "parse_cache.db")
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, namespace: str = "",
+                 ttl_seconds: float = 7 * 24 * 3600, memory_max: int = 512, memory_ttl_seconds: float = 3600,
+                 validate: Callable[[object], bool] = _has_intent):
+        self.logger = get_logger(self.__class__.__name__)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.memory_max = memory_max
+        self.memory_ttl_seconds = memory_ttl_seconds
+        # Cached values are revalidated on read; entries that fail (e.g. written by an older schema) are evicted
+        self.validate = validate
+        self.enabled = os.environ.get("JARVIS_LLM_CACHE", "1") != "0"
+
+        # key text -> (time.monotonic() when cached, value), least recently used first
+        self._memory = collections.OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk = self._open_disk(db_path) if self.enabled else None
+        if not self.enabled:
+            self.logger.info("LLM cache disabled by JARVIS_LLM_CACHE=0.")
+
+    def _open_disk(self, db_path: str) -> sqlite3.Connection | None:
+        """Opens (creating if needed) the SQLite cache file and drops expired entries."""
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            # Access is serialized through self._disk_lock, so the connection can be shared across threads
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM parse_cache WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+            self.logger.info("Parse cache opened at %s", db_path)
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            self.logger.warning("Could not open parse cache at %s, continuing without it: %s", db_path, e)
+            return None
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256((self.namespace + text).encode("utf-8")).hexdigest()
+
+    def get(self, text: str):
+        """Looks the text up in memory, then on disk. Returns a copy the caller may mutate, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._memory_lock:
+            cached = self._memory.get(text)
+            if cached is not None:
+                cached_at, value = cached
+                if time.monotonic() - cached_at < self.memory_ttl_seconds:
+                    self._memory.move_to_end(text)
+                    self.logger.debug("Memory cache hit for '%s'", text)
+                    return copy.deepcopy(value)
+                del self._memory[text]
+
+        value = self._disk_get(text)
+        if value is None:
+            return None
+        if not self.validate(value):
+            self.logger.warning("Evicting invalid cache entry for '%s': %r", text, value)
+            self.evict(text)
+            return None
+        self._memory_put(text, value)
+        return value
+
+    def set(self, text: str, value):
+        """Stores the value in memory and on disk."""
+        if not self.enabled:
+            return
+        self._memory_put(text, value)
+        self._disk_put(text, value)
+
+    def evict(self, text: str):
+        """Removes the entry from both levels."""
+        with self._memory_lock:
+            self._memory.pop(text, None)
+        if self._disk is None:
+            return
+        try:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM parse_cache WHERE key = ?", (self._key(text),))
+                self._disk.commit()
+        except sqlite3.Error as e:
+            self.logger.warning("Parse cache eviction failed: %s", e)
+
+    def _memory_put(self, text: str, value):
+        with self._memory_lock:
+            self._memory[text] = (time.monotonic(), copy.deepcopy(value))
+            self._memory.move_to_end(text)
+            if len(self._memory) > self.memory_max:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, text: str):
+        if self._disk is None:
+            return None
+        try:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT value FROM parse_cache WHERE key = ? AND expires_at >= ?",
+                    (self._key(text), time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.logger.warning("Parse cache lookup failed: %s", e)
+            return None
+        if row is None:
+            return None
+        self.logger.info("Parse cache hit for '%s'", text)
+        try:
+            return _json_loads(row[0])
+        except ValueError: # Corrupt row; treat as a miss, it is overwritten on the next set()
+            return None
+
+    def _disk_put(self, text: str, value):
+        if self._disk is None:
+            return
+        try:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO parse_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (self._key(text), json.dumps(value), time.time() + self.ttl_seconds)
+                )
+                self._disk.commit()
+        except sqlite3.Error as e:
+            self.logger.warning("Parse cache write failed: %s", e)
+
+
+class TemplateCache:
+    """
+    Generalizes parsed commands over their entity slots, so "open chrome" and "open firefox" share one
+    entry. learn() turns a command plus its parse into a template by replacing the entity values found
+    in the text with typed slots ("open <app_name:1>"); match() fills the slots of a matching template from a
+    new command and builds the parse locally. Templates are bucketed by their first word, so a lookup
+    only tries the few templates that can apply. In-memory only; relearned after a restart.
+    """
+    # Entities whose values are copied from the command text, and the slot type they become
+    SLOT_ENTITIES = {
+        "app_name": "APP", "url": "URL", "filepath": "PATH", "dir_path": "PATH", "path": "PATH", "level": "LEVEL",
+    }
+    # What one word of each slot type may look like. A slot matches exactly as many words as the value
+    # it was learned from, so "open <APP>" learned from "open chrome" doesn't swallow "open my documents folder".
+    # Levels keep the shape they were learned with: "to 0.5" (a fraction) and "to 50" (a percentage) are
+    # different scales, so a template learned from one must not fill the other.
+    _SLOT_WORD_PATTERNS = {
+        "APP": r"[a-z0-9][a-z0-9+\-]*",
+        "URL": r"(?:https?://)?(?:[a-z0-9\-]+\.)+[a-z]{2,}(?:[/?#]\S*)?", # Must look like a URL or domain
+        "PATH": r"\S+",
+        "LEVEL_INT": r"\d+",
+        "LEVEL_DEC": r"\d*\.\d+",
+    }
+    # Slot values the command text was lower-cased for; the template may only fill them if the original
+    # command has the same text, otherwise "open Notes.TXT" would come back as "notes.txt"
+    _CASE_SENSITIVE_SLOTS = frozenset(("URL", "PATH"))
+    # Valid levels by learned type: brightness is a 0-100 integer, volume a 0.0-1.0 fraction. A template
+    # learned from "set brightness to 50" must not turn "set brightness to 5000" into a parse.
+    _LEVEL_RANGES = {int: (0, 100), float: (0.0, 1.0)}
+    # App slots are only generalized after these verbs: with any other verb the slot can swallow things that
+    # aren't apps ("start spotify" -> "start recording")
+    APP_TEMPLATE_VERBS = frozenset(("open", "launch", "close"))
+    # Never answered from a template: a wrong generalization here destroys data or runs arbitrary commands
+    NEVER_TEMPLATE_INTENTS = frozenset(("delete_path", "move_path", "execute_command"))
+    MAX_TEMPLATES = 256
+
+    def __init__(self):
+        self.logger = get_logger(self.__class__.__name__)
+        # first word -> {template: (compiled regex, intent, entities with slot names in place of values)}
+        self._buckets: dict[str, dict[str, tuple[re.Pattern, str, dict]]] = collections.defaultdict(dict)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _templatize(self, text: str, entities: dict) -> tuple[str, dict] | None:
+        """Returns (template, slotted entities), or None if the parse can't be generalized safely."""
+        template = text
+        slotted_entities = {}
+        for name, value in entities.items():
+            slot_type = self.SLOT_ENTITIES.get(name)
+            if slot_type == "LEVEL":
+                slot_type = "LEVEL_INT" if isinstance(value, int) else "LEVEL_DEC"
+            # The slot's text must be the entity value verbatim (no case folding, no reformatting), so that
+            # filling the slot from another command reproduces what the LLM would have returned
+            value_text = str(value) if isinstance(value, (str, int, float)) and not isinstance(value, bool) else None
+            value_words = value_text.split() if value_text else []
+            if slot_type and value_words and all(re.fullmatch(self._SLOT_WORD_PATTERNS[slot_type], word) for word in value_words):
+                # The value must appear exactly once, as whole words, to know where the slot is
+                occurrences = re.findall(rf"(?<!\S){re.escape(value_text)}(?!\S)", template)
+                if len(occurrences) != 1:
+                    return None
+                template = re.sub(rf"(?<!\S){re.escape(value_text)}(?!\S)", f"<{name}:{len(value_words)}:{slot_type}>", template)
+                slotted_entities[name] = (f"<{name}>", type(value))
+            elif isinstance(value, str) and value and value.lower() in text:
+                return None # Copied from the text but not a known slot (e.g. file content): not generalizable
+            else:
+                slotted_entities[name] = value # Constant, e.g. player_name "default" or summarize true
+        if template == text or not any(not word.startswith("<") for word in template.split()):
+            return None # No slot, or nothing but slots: an exact-match cache covers the first, the second matches anything
+        return template, slotted_entities
+
+    def _slot_regex(self, marker: re.Match) -> str:
+        """Regex for a "<name:word count:slot type>" marker in a template."""
+        name, word_count, slot_type = marker.group(1), int(marker.group(2)), marker.group(3)
+        word = self._SLOT_WORD_PATTERNS[slot_type]
+        return f"(?P<{name}>{word}(?: {word}){{{word_count - 1}}})"
+
+    def learn(self, text: str, parsed: dict):
+        """Derives and stores a template from a command and its (successful) parse."""
+        intent = parsed.get("intent")
+        entities = parsed.get("entities")
+        if not intent or intent == "unknown" or intent in self.NEVER_TEMPLATE_INTENTS or not isinstance(entities, dict):
+            return
+        if parsed.get("actions"):
+            return # Multi-action parses carry entities beyond the top-level ones, which the slots wouldn't cover
+        templatized = self._templatize(text, entities)
+        if templatized is None:
+            return
+        template, slotted_entities = templatized
+        first_word = template.split(" ", 1)[0]
+        if first_word.startswith("<"):
+            return # Bucketing needs a literal first word
+        if ":APP>" in template and first_word not in self.APP_TEMPLATE_VERBS:
+            return
+        pattern = "^" + re.sub(r"<(\w+):(\d+):(\w+)>", self._slot_regex, re.escape(template)) + "$"
+        with self._lock:
+            bucket = self._buckets[first_word]
+            if template not in bucket:
+                if self._count >= self.MAX_TEMPLATES:
+                    return
+                self._count += 1
+                self.logger.info("Learned command template '%s' -> %s", template, intent)
+            bucket[template] = (re.compile(pattern), intent, slotted_entities)
+
+    def _in_range(self, name: str, value) -> bool:
+        """False for a level outside its valid range (see _LEVEL_RANGES); True for every other entity."""
+        if self.SLOT_ENTITIES.get(name) != "LEVEL" or type(value) not in self._LEVEL_RANGES:
+            return True
+        low, high = self._LEVEL_RANGES[type(value)]
+        return low <= value <= high
+
+    def match(self, text: str, original_text: str | None = None) -> dict | None:
+        """
+        Returns the parse for the command built from a matching template, or None.
+        `original_text` is the command before normalization; when given, path and URL slots only match
+        if their value appears in it unchanged (i.e. lower-casing didn't alter it).
+        """
+        with self._lock:
+            candidates = list(self._buckets.get(text.split(" ", 1)[0], {}).items())
+        for template, (regex, intent, slotted_entities) in candidates:
+            m = regex.match(text)
+            if not m:
+                continue
+            if original_text is not None and any(
+                self.SLOT_ENTITIES[name] in self._CASE_SENSITIVE_SLOTS and m.group(name) not in original_text
+                for name, value in slotted_entities.items() if isinstance(value, tuple)
+            ):
+                continue
+            entities = {}
+            for name, value in slotted_entities.items():
+                if isinstance(value, tuple): # (slot marker, original value type)
+                    slot_value = m.group(name)
+                    value_type = value[1]
+                    entities[name] = value_type(slot_value) if value_type in (int, float) else slot_value
+                else:
+                    entities[name] = copy.deepcopy(value)
+            if not all(self._in_range(name, entities[name]) for name in slotted_entities):
+                continue
+            self.logger.info("Template '%s' matched '%s'", template, text)
+            return {"intent": intent, "entities": entities}
+        return None
+
+    def revise_template(self, text: str) -> bool:
+        """
+        Forgets the template that matched `text`, e.g. after the user reports the command was misunderstood,
+        so the next similar command goes back to the LLM. Returns True if a template was removed.
+        """
+        with self._lock:
+            bucket = self._buckets.get(text.split(" ", 1)[0], {})
+            for template, (regex, _, _) in list(bucket.items()):
+                if regex.match(text):
+                    del bucket[template]
+                    self._count -= 1
+                    self.logger.info("Removed command template '%s'", template)
+                    return True
+        return False
+
+
+if __name__ == '__main__':
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "cache.db")
+        cache = LLMCache(db_path, namespace="test")
+        assert cache.get("open chrome") is None
+        cache.set("open chrome", {"intent": "open_app", "entities": {"app_name": "chrome"}})
+        assert cache.get("open chrome")["entities"]["app_name"] == "chrome"
+
+        # A fresh instance (e.g. after a restart) reads the entry back from disk
+        assert LLMCache(db_path, namespace="test").get("open chrome")["intent"] == "open_app"
+        # A different namespace doesn't see it
+        assert LLMCache(db_path, namespace="other").get("open chrome") is None
+
+        # Entries that fail validation are evicted instead of returned
+        cache.set("bad entry", {"no_intent": True})
+        assert LLMCache(db_path, namespace="test").get("bad entry") is None
+        print("LLMCache tests passed.")
+
+    templates = TemplateCache()
+    templates.learn("open chrome", {"intent": "open_app", "entities": {"app_name": "chrome"}})
+    assert templates.match("open firefox") == {"intent": "open_app", "entities": {"app_name": "firefox"}}
+    assert templates.match("open my documents folder") is None
+    # App slots are only learned after open/launch/close
+    templates.learn("start spotify", {"intent": "open_app", "entities": {"app_name": "spotify"}})
+    assert templates.match("start recording") is None
+    templates.learn("set volume to 30", {"intent": "set_volume", "entities": {"level": 30}})
+    assert templates.match("set volume to 75") == {"intent": "set_volume", "entities": {"level": 75}}
+    # A level keeps its learned shape: a fraction template doesn't fill in a percentage, and a value the
+    # LLM rescaled ("30" -> 0.3) isn't generalized at all
+    templates.learn("lower volume to 0.5", {"intent": "set_volume", "entities": {"level": 0.5}})
+    assert templates.match("lower volume to 0.8") == {"intent": "set_volume", "entities": {"level": 0.8}}
+    assert templates.match("lower volume to 50") is None
+    # Levels outside the valid range go to the LLM
+    templates.learn("set brightness to 50", {"intent": "set_brightness", "entities": {"level": 50}})
+    assert templates.match("set brightness to 80") == {"intent": "set_brightness", "entities": {"level": 80}}
+    assert templates.match("set brightness to 5000") is None
+    assert templates.match("lower volume to 1.5") is None
+    templates.learn("turn volume to 40", {"intent": "set_volume", "entities": {"level": 0.4}})
+    assert templates.match("turn volume to 60") is None
+    # URL slots only take URLs or domains
+    templates.learn("go to example.com", {"intent": "open_website", "entities": {"url": "example.com"}})
+    assert templates.match("go to wikipedia.org")["entities"]["url"] == "wikipedia.org"
+    assert templates.match("go to it") is None
+    # Path slots aren't filled from text whose case was folded
+    templates.learn("show notes.txt", {"intent": "summarize_text", "entities": {"filepath": "notes.txt"}})
+    assert templates.match("show todo.txt", original_text="show todo.txt")["entities"]["filepath"] == "todo.txt"
+    assert templates.match("show todo.txt", original_text="show TODO.txt") is None
+    # Destructive intents are never generalized
+    templates.learn("delete old.txt", {"intent": "delete_path", "entities": {"path": "old.txt"}})
+    assert templates.match("delete everything") is None
+    # Free text that isn't a slot is never generalized
+    templates.learn("create a note saying hi", {"intent": "create_file", "entities": {"filepath": "note.txt", "content": "hi"}})
+    assert templates.match("create a note saying bye") is None
+    assert templates.revise_template("open firefox") and templates.match("open firefox") is None
+    print("TemplateCache tests passed.")
@@ -1,10 +1,66 @@
 # Handles authentication, secure storage
 
+import os
 import keyring
 import getpass # For securely getting master password if needed
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from jarvis_assistant.utils.logger import get_logger
+
+# Ensure the logger can be found if this module is run standalone for testing
+if __name__ == '__main__' and __package__ is None:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from jarvis_assistant.utils.logger import get_logger
 
 class SecurityManager:
     SERVICE_NAME = "JARVIS_ASSISTANT"
+    # Retrieved secrets are kept in memory briefly so repeated reads skip the OS keyring IPC.
+    # Trade-off: a secret stays in process memory for up to CACHE_TTL_SECONDS after its last read.
+    CACHE_TTL_SECONDS = 60
+    CACHE_MAX_ENTRIES = 64
+    # After a successful transaction authentication, further confirmations within this window
+    # don't prompt again. invalidate_auth() ends the window early (e.g. on logout).
+    AUTH_WINDOW_SECONDS = 120
+    # Keyring reads in get_many() run concurrently; most backends (macOS Keychain, Secret Service over
+    # D-Bus, Windows Credential Manager) spend the call waiting on IPC with the GIL released.
+    BULK_READ_WORKERS = 4
+
+    def __init__(self):
+        self.logger = get_logger(self.__class__.__name__)
+        # keyring entry name -> (time cached, value), least recently used first
+        self._cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._auth_until = 0.0 # time.monotonic() deadline of the current authentication window
+
+    def _cache_get(self, entry_name: str) -> str | None:
+        with self._cache_lock:
+            cached = self._cache.get(entry_name)
+            if cached is None:
+                return None
+            cached_at, value = cached
+            if time.monotonic() - cached_at >= self.CACHE_TTL_SECONDS:
+                del self._cache[entry_name]
+                return None
+            self._cache.move_to_end(entry_name)
+            return value
+
+    def _cache_put(self, entry_name: str, value: str):
+        with self._cache_lock:
+            self._cache[entry_name] = (time.monotonic(), value)
+            self._cache.move_to_end(entry_name)
+            if len(self._cache) > self.CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+    def _cache_invalidate(self, entry_name: str):
+        with self._cache_lock:
+            self._cache.pop(entry_name, None)
 
     def store_sensitive_data(self, username: str, data_key: str, data_value: str):
         """
@@ -12,47 +68,101 @@ class SecurityManager:
         The 'username' here could be a generic user for the assistant or specific if multi-user.
         'data_key' is what the data is for, e.g., 'google_form_email'.
         """
+        entry_name = f"{username}_{data_key}"
+        self._cache_invalidate(entry_name)
         try:
-            keyring.set_password(self.SERVICE_NAME, f"{username}_{data_key}", data_value)
-            print(f"Data for '{data_key}' stored securely.")
+            keyring.set_password(self.SERVICE_NAME, entry_name, data_value)
+            self.logger.info(f"Data for '{data_key}' stored securely.")
         except Exception as e:
-            print(f"Error storing sensitive data: {e}")
+            self.logger.error(f"Error storing sensitive data: {e}")
 
     def get_sensitive_data(self, username: str, data_key: str) -> str | None:
         """
-        Retrieves sensitive data from the system's keyring.
+        Retrieves sensitive data from the system's keyring, or from the short-lived in-memory cache.
         Returns None if not found or if an error occurs.
         """
+        entry_name = f"{username}_{data_key}"
+        cached = self._cache_get(entry_name)
+        if cached is not None:
+            return cached
         try:
-            data = keyring.get_password(self.SERVICE_NAME, f"{username}_{data_key}")
+            data = keyring.get_password(self.SERVICE_NAME, entry_name)
             if data:
-                print(f"Data for '{data_key}' retrieved.")
+                self.logger.info(f"Data for '{data_key}' retrieved.")
+                self._cache_put(entry_name, data)
                 return data
             else:
-                print(f"No data found for '{data_key}'.")
+                self.logger.info(f"No data found for '{data_key}'.")
                 return None
         except Exception as e:
-            print(f"Error retrieving sensitive data: {e}")
+            self.logger.error(f"Error retrieving sensitive data: {e}")
             return None
 
+    def get_many(self, username: str, data_keys: Iterable[str]) -> dict[str, str | None]:
+        """
+        Retrieves several entries at once, e.g. all the fields of a form. Cached entries are served from
+        memory and the rest are read from the keyring concurrently instead of one IPC round trip after
+        another. Returns data_key -> value, with None for entries that are missing or failed to read.
+        """
+        results: dict[str, str | None] = {}
+        missing: list[str] = []
+        for data_key in dict.fromkeys(data_keys): # De-duplicated, order kept
+            cached = self._cache_get(f"{username}_{data_key}")
+            if cached is not None:
+                results[data_key] = cached
+            else:
+                missing.append(data_key)
+
+        def read(data_key: str) -> str | None:
+            try:
+                return keyring.get_password(self.SERVICE_NAME, f"{username}_{data_key}")
+            except Exception as e:
+                self.logger.error(f"Error retrieving sensitive data for '{data_key}': {e}")
+                return None
+
+        if len(missing) == 1:
+            values = [read(missing[0])]
+        elif missing:
+            with ThreadPoolExecutor(max_workers=min(self.BULK_READ_WORKERS, len(missing))) as pool:
+                values = list(pool.map(read, missing))
+        else:
+            values = []
+        for data_key, value in zip(missing, values):
+            if value:
+                self._cache_put(f"{username}_{data_key}", value)
+            results[data_key] = value or None
+        self.logger.info(f"Retrieved {sum(v is not None for v in results.values())} of {len(results)} requested entries.")
+        return results
+
     def delete_sensitive_data(self, username: str, data_key: str):
         """
         Deletes sensitive data from the system's keyring.
         """
+        entry_name = f"{username}_{data_key}"
+        self._cache_invalidate(entry_name)
         try:
-            keyring.delete_password(self.SERVICE_NAME, f"{username}_{data_key}")
-            print(f"Data for '{data_key}' deleted.")
+            keyring.delete_password(self.SERVICE_NAME, entry_name)
+            self.logger.info(f"Data for '{data_key}' deleted.")
         except keyring.errors.PasswordDeleteError:
-            print(f"No data found for '{data_key}' to delete or deletion failed.")
+            self.logger.warning(f"No data found for '{data_key}' to delete or deletion failed.")
         except Exception as e:
-            print(f"Error deleting sensitive data: {e}")
+            self.logger.error(f"Error deleting sensitive data: {e}")
+
+    def invalidate_auth(self):
+        """Ends the current authentication window so the next transaction prompts again."""
+        self._auth_until = 0.0
 
     def authenticate_user_for_transaction(self) -> bool:
         """
         Placeholder for a robust user authentication before financial transactions.
         This needs to be significantly more advanced for real-world use.
         For now, it might ask for a master password or use OS-level authentication.
+        A successful authentication is remembered for AUTH_WINDOW_SECONDS.
         """
+        if time.monotonic() < self._auth_until:
+            self.logger.info("User already authenticated for transactions in this session window.")
+            return True
+
         # IMPORTANT: This is a very basic placeholder.
         # Real authentication should involve multi-factor authentication (MFA)
         # and potentially integrate with OS biometric features if possible.
@@ -65,14 +175,17 @@ class SecurityManager:
             # For this example, let's assume a hardcoded password for testing (VERY INSECURE).
             # Replace 'SUPER_SECRET_PASSWORD' with a more secure mechanism in any real deployment.
             # Or, better yet, integrate with OS authentication.
-            if password == "SUPER_SECRET_PASSWORD_DEMO_ONLY": # Replace or remove this
-                print("Authentication successful (DEMO).")
+            # compare_digest avoids leaking how much of the password matched through timing
+            # When a real scheme lands, keep the derived key in memory for the window instead of re-running the KDF.
+            if hmac.compare_digest(password.encode(), b"SUPER_SECRET_PASSWORD_DEMO_ONLY"): # Replace or remove this
+                self.logger.info("Authentication successful (DEMO).")
+                self._auth_until = time.monotonic() + self.AUTH_WINDOW_SECONDS
                 return True
             else:
-                print("Authentication failed.")
+                self.logger.warning("Authentication failed.")
                 return False
         except Exception as e:
-            print(f"Error during authentication: {e}")
+            self.logger.error(f"Error during authentication: {e}")
             return False
 
 
@@ -93,8 +206,15 @@ if __name__ == '__main__':
     if email:
         print(f"Retrieved Email: {email}")
 
+    # Second read within CACHE_TTL_SECONDS is served from memory
+    assert manager.get_sensitive_data(test_user, "email_address") == email
+
     non_existent = manager.get_sensitive_data(test_user, "non_existent_key")
 
+    # Bulk read: cached and uncached entries together, missing ones come back as None
+    bulk = manager.get_many(test_user, ["test_api_key", "email_address", "non_existent_key"])
+    assert bulk == {"test_api_key": api_key, "email_address": email, "non_existent_key": None}
+
     # Test deleting data
     manager.delete_sensitive_data(test_user, "test_api_key")
     api_key_after_delete = manager.get_sensitive_data(test_user, "test_api_key")
@@ -105,6 +225,9 @@ if __name__ == '__main__':
     print("\nAttempting transaction authentication...")
     if manager.authenticate_user_for_transaction():
         print("Transaction would proceed.")
+        # A second transaction within AUTH_WINDOW_SECONDS doesn't prompt again
+        assert manager.authenticate_user_for_transaction()
+        manager.invalidate_auth()
     else:
         print("Transaction would be cancelled.")
 
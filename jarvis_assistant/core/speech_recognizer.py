@@ -1,50 +1,265 @@
 # Handles voice input
+import atexit
+import os
+import threading
+import time
+from typing import Iterator
 import speech_recognition as sr
+from jarvis_assistant.config import STT_BACKEND, WHISPER_MODEL_SIZE
+from jarvis_assistant.utils.logger import get_logger
+
+# Ensure config and the logger can be found if this module is run standalone for testing
+if __name__ == '__main__' and __package__ is None:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from jarvis_assistant.config import STT_BACKEND, WHISPER_MODEL_SIZE
+    from jarvis_assistant.utils.logger import get_logger
 
 class SpeechRecognizer:
+    # The streaming backend sends the shared microphone's 16-bit mono audio in 100 ms chunks.
+    STREAM_CHUNK_SECONDS = 0.1
+    # Ambient-noise calibration is done once at startup; after this long it is refreshed in the
+    # background between commands (dynamic_energy_threshold handles gradual drift in the meantime).
+    RECALIBRATE_AFTER_SECONDS = 300
+    CALIBRATION_DURATION_SECONDS = 0.5
+
     def __init__(self):
+        self.logger = get_logger(self.__class__.__name__)
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
+        # Let the library keep adapting the energy threshold while listening, instead of recalibrating per command
+        self.recognizer.dynamic_energy_threshold = True
+        # The microphone stream is opened once and kept open for the recognizer's lifetime, instead of
+        # re-opening the audio device for every command. Released by close() (also registered with atexit).
+        self._source = self.microphone.__enter__()
+        atexit.register(self.close)
+        # The shared stream must only be read by one caller at a time: listen() or recalibration
+        self._mic_lock = threading.Lock()
+        self._recalibrating = False
+        self._calibrated_at = 0.0
         # Adjust for ambient noise once at the beginning
-        # with self.microphone as source:
-        #     self.recognizer.adjust_for_ambient_noise(source)
-        # print("Speech recognizer initialized and calibrated for ambient noise.")
+        self._calibrate()
+        self.logger.info("Speech recognizer initialized and calibrated for ambient noise.")
+
+        self.backend = STT_BACKEND
+        if self.backend == "google_cloud_streaming":
+            try:
+                self._init_cloud_streaming()
+            except Exception as e: # ImportError if google-cloud-speech is missing, auth errors otherwise
+                self.logger.warning(f"Streaming speech recognition unavailable ({e}); falling back to Google Web Speech.")
+                self.backend = "google_web"
+        elif self.backend == "faster_whisper":
+            try:
+                self._init_whisper()
+            except Exception as e: # ImportError if faster-whisper is missing, model download/load errors otherwise
+                self.logger.warning(f"Offline speech recognition unavailable ({e}); falling back to Google Web Speech.")
+                self.backend = "google_web"
+
+    def _calibrate(self):
+        """Measures ambient noise to set the recognizer's energy threshold."""
+        with self._mic_lock:
+            self.recognizer.adjust_for_ambient_noise(self._source, duration=self.CALIBRATION_DURATION_SECONDS)
+        self._calibrated_at = time.monotonic()
+
+    def close(self):
+        """Releases the microphone. Safe to call more than once."""
+        with self._mic_lock:
+            if self._source is not None:
+                self.microphone.__exit__(None, None, None)
+                self._source = None
+
+    def _recalibrate_in_background(self):
+        """Refreshes the calibration on a daemon thread if it is stale, so it never delays listen()."""
+        if self._recalibrating or time.monotonic() - self._calibrated_at < self.RECALIBRATE_AFTER_SECONDS:
+            return
+        self._recalibrating = True
+
+        def recalibrate():
+            try:
+                self._calibrate()
+            except Exception as e:
+                self.logger.warning(f"Background ambient noise recalibration failed: {e}")
+            finally:
+                self._recalibrating = False
+
+        threading.Thread(target=recalibrate, name="MicRecalibration", daemon=True).start()
+
+    def _init_cloud_streaming(self):
+        """Sets up the Google Cloud Speech client and the reusable streaming config."""
+        from google.cloud import speech
+        self._speech = speech
+        self._speech_client = speech.SpeechClient()
+        self._streaming_config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=self._source.SAMPLE_RATE, # Audio comes from the shared microphone stream
+                language_code="en-US",
+            ),
+            interim_results=True,
+            single_utterance=True, # Server ends the stream when it detects the end of the utterance
+        )
+        self.logger.info("Speech recognizer using Google Cloud streaming recognition.")
+
+    def _init_whisper(self):
+        """Loads the faster-whisper model once; int8 keeps CPU inference fast and memory small."""
+        from faster_whisper import WhisperModel
+        self._whisper = WhisperModel(WHISPER_MODEL_SIZE, device="auto", compute_type="int8")
+        self.logger.info(f"Speech recognizer using offline faster-whisper model '{WHISPER_MODEL_SIZE}'.")
+
+    def _transcribe_whisper(self, audio: sr.AudioData) -> str:
+        """Transcribes captured audio locally with faster-whisper."""
+        import numpy as np # Installed with faster-whisper
+        # Whisper expects 16 kHz mono float32 samples in [-1, 1]
+        pcm = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=np.int16)
+        segments, _ = self._whisper.transcribe(
+            pcm.astype(np.float32) / 32768.0, language="en", beam_size=1, vad_filter=True
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def _stream_cloud(self) -> Iterator[tuple[str, bool]]:
+        """
+        Streams microphone audio to Google Cloud Speech while the user is speaking and yields
+        (transcript, is_final) as interim and final results arrive, so upload and recognition overlap
+        with speech instead of following it. Stops after the first final result.
+        """
+        # Reads from the persistent microphone stream, held for the whole utterance like _listen_captured()
+        self._mic_lock.acquire()
+        if self._source is None:
+            self._mic_lock.release()
+            self.logger.warning("Microphone has been closed.")
+            return
+        stream = self._source.stream
+        chunk_frames = int(self._source.SAMPLE_RATE * self.STREAM_CHUNK_SECONDS)
+        stop_event = threading.Event()
+        read_lock = threading.Lock() # Held while a chunk is being read, so shutdown can wait for it
+
+        def audio_requests():
+            # Consumed by the gRPC client on its own thread, so audio keeps flowing while responses are read here
+            while True:
+                with read_lock:
+                    if stop_event.is_set():
+                        return
+                    chunk = stream.read(chunk_frames)
+                yield self._speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        responses = None
+        try:
+            self.logger.debug("Listening...")
+            responses = self._speech_client.streaming_recognize(self._streaming_config, audio_requests(), timeout=15)
+            for response in responses:
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    transcript = result.alternatives[0].transcript.strip().lower()
+                    if result.is_final:
+                        self.logger.info(f"Recognized: {transcript}")
+                        yield transcript, True
+                        return
+                    if transcript:
+                        yield transcript, False
+            self.logger.info("No speech detected.")
+        finally:
+            # Also runs when the caller stops iterating early (e.g. it already acted on a partial).
+            # The request generator may be mid-read on the gRPC thread: stop it and wait for that read
+            # to finish before anyone else may use the microphone. The stream itself stays open.
+            stop_event.set()
+            if responses is not None and hasattr(responses, "cancel"):
+                responses.cancel()
+            with read_lock:
+                self._mic_lock.release()
 
+    def _listen_streaming(self) -> str | None:
+        """Returns the final transcript from the streaming backend."""
+        for transcript, is_final in self._stream_cloud():
+            if is_final:
+                return transcript or None
+        return None
+
+    def stream_listen(self) -> Iterator[tuple[str, bool]]:
+        """
+        Listens for one command and yields (text, is_final) pairs: interim transcripts while the user is
+        still speaking (streaming backend only), then the final transcript. With the other backends, or
+        if streaming fails before producing anything, only the final transcript is yielded.
+        Nothing is yielded when no command was recognized.
+        """
+        if self.backend == "google_cloud_streaming":
+            produced = False
+            try:
+                for transcript, is_final in self._stream_cloud():
+                    produced = True
+                    yield transcript, is_final
+                return
+            except Exception as e:
+                if produced:
+                    self.logger.error(f"Streaming speech recognition failed mid-utterance: {e}")
+                    return
+                self.logger.warning(f"Streaming speech recognition failed ({e}); using Google Web Speech for this command.")
+        command = self._listen_captured()
+        if command:
+            yield command, True
 
     def listen(self) -> str | None:
         """
         Listens for a command from the user via microphone.
         Returns the recognized text or None if recognition fails.
         """
-        with self.microphone as source:
-            print("Listening...")
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.5) # Re-calibrate quickly
+        if self.backend == "google_cloud_streaming":
             try:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
+                return self._listen_streaming()
+            except Exception as e:
+                self.logger.warning(f"Streaming speech recognition failed ({e}); using Google Web Speech for this command.")
+        return self._listen_captured()
+
+    def _listen_captured(self) -> str | None:
+        """Records one phrase from the microphone, then transcribes it (faster-whisper or Google Web Speech)."""
+        with self._mic_lock:
+            if self._source is None:
+                self.logger.warning("Microphone has been closed.")
+                return None
+            self.logger.debug("Listening...")
+            try:
+                audio = self.recognizer.listen(self._source, timeout=5, phrase_time_limit=10)
             except sr.WaitTimeoutError:
-                print("No speech detected within timeout.")
+                self.logger.info("No speech detected within timeout.")
                 return None
+        # Runs while the caller processes this command, ready before the next listen()
+        self._recalibrate_in_background()
+
+        if self.backend == "faster_whisper":
+            try:
+                self.logger.debug("Recognizing (offline)...")
+                command = self._transcribe_whisper(audio)
+                if not command:
+                    self.logger.info("Offline recognition could not understand audio")
+                    return None
+                self.logger.info(f"Recognized: {command}")
+                return command.lower()
+            except Exception as e:
+                self.logger.warning(f"Offline speech recognition failed ({e}); using Google Web Speech for this command.")
 
         try:
-            print("Recognizing...")
+            self.logger.debug("Recognizing...")
             # Using Google Web Speech API by default with SpeechRecognition
             # This requires internet access.
             # For offline, CMU Sphinx (PocketSphinx) can be configured.
             command = self.recognizer.recognize_google(audio)
-            print(f"Recognized: {command}")
+            self.logger.info(f"Recognized: {command}")
             return command.lower()
         except sr.UnknownValueError:
-            print("Google Speech Recognition could not understand audio")
+            self.logger.info("Google Speech Recognition could not understand audio")
             return None
         except sr.RequestError as e:
-            print(f"Could not request results from Google Speech Recognition service; {e}")
+            self.logger.error(f"Could not request results from Google Speech Recognition service; {e}")
             return None
         except Exception as e:
-            print(f"An unexpected error occurred during speech recognition: {e}")
+            self.logger.error(f"An unexpected error occurred during speech recognition: {e}")
             return None
 
 if __name__ == '__main__':
     recognizer = SpeechRecognizer()
+    print(f"Using speech backend: {recognizer.backend}")
     while True:
         command = recognizer.listen()
         if command:
@@ -54,3 +269,4 @@ if __name__ == '__main__':
             print(f"You said: {command}")
         else:
             print("No command recognized or error occurred.")
+    recognizer.close()
@@ -1,8 +1,39 @@
 # Handles voice output
+import os
+import queue
+import re
+import threading
 import pyttsx3
+from jarvis_assistant.utils.logger import get_logger
+
+# Ensure the logger can be found if this module is run standalone for testing
+if __name__ == '__main__' and __package__ is None:
+    import sys
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from jarvis_assistant.utils.logger import get_logger
 
 class TextToSpeech:
+    # Sentence boundary: end punctuation followed by a capitalized word, so "J.A.R.V.I.S. online" stays whole
+    _SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
     def __init__(self):
+        self.logger = get_logger(self.__class__.__name__)
+        # Speech runs on a dedicated worker thread so speak() returns immediately and the caller
+        # can carry on (parse the next command, etc.) while the text is being spoken.
+        # The engine is created on the worker thread itself, since some pyttsx3 drivers (e.g. SAPI5)
+        # must be used from the thread that initialized them.
+        self._q: queue.Queue[str] = queue.Queue()
+        self._ready = threading.Event()
+        self._init_error = None
+        self._worker_thread = threading.Thread(target=self._worker, name="TextToSpeech", daemon=True)
+        self._worker_thread.start()
+        self._ready.wait()
+        if self._init_error:
+            raise self._init_error
+
+    def _init_engine(self):
         self.engine = pyttsx3.init()
         # Optional: Adjust properties like rate, volume
         # self.engine.setProperty('rate', 150)
@@ -12,20 +43,72 @@ class TextToSpeech:
         # For example, to select a female voice if available
         # self.engine.setProperty('voice', voices[1].id) # Index might vary
 
+    def _worker(self):
+        try:
+            self._init_engine()
+        except Exception as e:
+            self._init_error = e
+            return
+        finally:
+            self._ready.set()
+
+        while True:
+            text = self._q.get()
+            try:
+                self.engine.say(text)
+                self.engine.runAndWait()
+            except Exception as e:
+                self.logger.error(f"Error in TTS: {e}")
+            finally:
+                self._q.task_done()
+
     def speak(self, text: str):
         """
-        Speaks the given text.
+        Queues the given text to be spoken and returns without waiting for it.
+        Use flush() to wait until everything queued has been spoken.
+        Text is queued sentence by sentence, so playback starts once the first sentence is synthesized
+        instead of the whole response, and stop() drops the sentences that haven't started yet.
         """
         if not text:
-            print("TTS: No text to speak.")
+            self.logger.debug("TTS: No text to speak.")
             return
+        for sentence in self._SENTENCE_SPLIT_RE.split(text):
+            self._q.put_nowait(sentence)
+
+    def flush(self):
+        """Blocks until all queued text has been spoken (e.g. so a final "Goodbye!" is heard before exit)."""
+        self._q.join()
+
+    def clear(self):
+        """Drops queued text that hasn't started playing yet. The current utterance, if any, finishes."""
+        while True:
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                break
+            self._q.task_done()
+
+    def stop(self):
+        """
+        Barge-in: drops queued text and interrupts the utterance currently playing, so a new command
+        doesn't have to wait for the previous response. Only call this when a new command arrives,
+        not after every utterance.
+        """
+        self.clear()
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
+            self.engine.stop()
         except Exception as e:
-            print(f"Error in TTS: {e}")
+            self.logger.error(f"Error stopping TTS: {e}")
 
 if __name__ == '__main__':
     tts = TextToSpeech()
     tts.speak("Hello, I am your virtual assistant. How can I help you today?")
     tts.speak("This is a test of the text to speech system.")
+    print("speak() returned immediately; waiting for speech to finish...")
+    tts.flush()
+
+    import time
+    tts.speak("This long sentence should be cut off shortly after it starts, to test interrupting speech.")
+    time.sleep(1)
+    tts.stop()
+    tts.flush()
@@ -1,212 +1,705 @@
 # Main application entry point
-import time
-from jarvis_assistant.core.speech_recognizer import SpeechRecognizer
-from jarvis_assistant.core.text_to_speech import TextToSpeech
-from jarvis_assistant.core.command_parser import CommandParser
-from jarvis_assistant.modules.os_interaction import OSInteraction
-from jarvis_assistant.modules.app_manager import AppManager
-from jarvis_assistant.modules.media_controller import MediaController
-from jarvis_assistant.modules.web_automator import WebAutomator # Import WebAutomator
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import functools
+import itertools
+import re
+import subprocess
+import threading
+from typing import TYPE_CHECKING, Callable
 from jarvis_assistant.utils.logger import get_logger
-from jarvis_assistant.config import GEMINI_API_KEY
+from jarvis_assistant.config import GEMINI_API_KEY, PREFERRED_INPUT_METHOD
 import os
 
+# The speech, LLM and agent modules pull in heavy dependencies (PortAudio, pyttsx3, the Gemini SDK,
+# requests/bs4, ...), so they are imported where first used rather than here; this lets the assistant
+# reach its first prompt sooner, and subsystems that are never used are never imported.
+if TYPE_CHECKING:
+    from jarvis_assistant.modules.os_interaction import OSInteraction
+    from jarvis_assistant.modules.app_manager import AppManager
+    from jarvis_assistant.modules.media_controller import MediaController
+    from jarvis_assistant.modules.web_automator import WebAutomator
+    from jarvis_assistant.core.speech_recognizer import SpeechRecognizer
+
 logger = get_logger("JARVIS_Main")
 
+_INPUT_CHOICES = frozenset("st") # Speak / Type
+# In-session input mode switch: "switch to voice", "switch to text", "/mode voice"; a bare "/mode" asks again
+_SWITCH_MODE_RE = re.compile(r"^\s*(?:(?:switch\s+to|/mode)\s+(voice|speech|text|typing)|(/mode))\s*$", re.IGNORECASE)
+_MODE_WORDS = {"voice": "s", "speech": "s", "text": "t", "typing": "t"}
+# Spoken/typed shutdown triggers, matched in a single pass. Add new phrases to the alternation.
+_EXIT_RE = re.compile(r"\b(?:exit|quit)\s+jarvis\b", re.IGNORECASE)
+_COMMAND_TAIL_LINES = 10
+# Minimum prefix_parse() confidence for acting on an interim speech transcript
+_EARLY_COMMIT_CONFIDENCE = 0.9
+# Input method of the previous session ("s" or "t"), see _expects_speech
+_LAST_INPUT_METHOD_PATH = os.path.join(os.path.expanduser("~"), ".jarvis", "last_input_method")
+
+# The home directory and platform don't change while the assistant runs, so resolve them once instead of per command
+_HOME = os.path.expanduser("~")
+# Set JARVIS_REFRESH_HOME=1 to re-read the home directory for every path instead (e.g. if HOME is changed at runtime)
+_REFRESH_HOME = os.environ.get("JARVIS_REFRESH_HOME", "0") != "0"
+_IS_WINDOWS = os.name == 'nt'
+_DEFAULT_SHELL = "cmd" if _IS_WINDOWS else "sh"
+# A file directly in the root of a drive: "C:/file.txt", "C:\\file.txt", "/file.txt"
+_ROOT_FILE_RE = re.compile(r"^(?:[A-Za-z]:)?[\\/][^\\/]+[\\/]?$")
+# Entities that hold filesystem paths, resolved by handle_os_interaction before dispatch
+_PATH_ENTITIES = ("filepath", "dir_path", "path", "source_path", "destination_path")
+
+
+@functools.lru_cache(maxsize=1024)
+def _isabs(path: str) -> bool:
+    return os.path.isabs(path)
+
+
+def _resolve_path(path: str) -> str:
+    """
+    Makes a path from the LLM absolute and normalized: relative paths (and "~") are taken relative
+    to the user's home.
+    """
+    home = os.path.expanduser("~") if _REFRESH_HOME else _HOME
+    if path == "~":
+        return home
+    if _isabs(path):
+        return os.path.normpath(path)
+    return os.path.normpath(os.path.join(home, path))
+
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def _speakable(message: str, max_chars: int = 200) -> str:
+    """
+    Shortens a response for speech. Multi-line output (directory listings, command output, file
+    snippets) is reduced to its first line plus a count, and long text to its first sentence;
+    the full text is printed instead, so the next command isn't held up by reading it all aloud.
+    """
+    first_line, _, rest = message.partition("\n")
+    extra_lines = sum(1 for line in rest.splitlines() if line.strip())
+    if extra_lines:
+        return f"{first_line.rstrip(': ')}: {extra_lines} line{'s' if extra_lines != 1 else ''} shown on screen."
+    if len(first_line) <= max_chars:
+        return first_line
+    first_sentence = _SENTENCE_END_RE.split(first_line, 1)[0]
+    if len(first_sentence) <= max_chars:
+        return first_sentence
+    return first_sentence[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        if value.strip().lower() in ("true", "yes", "1"):
+            return True
+        if value.strip().lower() in ("false", "no", "0", ""):
+            return False
+        raise ValueError(value)
+    return bool(value)
+
+
+# Entity types per intent: entity -> (converter, message if the value can't be converted).
+# The LLM may return numbers as strings ("50") or booleans as "true", so these are coerced once,
+# before dispatch, instead of each handler converting and catching errors itself.
+_INTENT_ENTITY_TYPES: dict[str, dict[str, tuple[Callable, str]]] = {
+    "set_brightness": {"level": (int, "Brightness level must be an integer.")},
+    "set_volume": {"level": (float, "Volume level must be a number (e.g., 0.5 for 50%).")},
+    "search_info": {"summarize": (_to_bool, "Summarize must be true or false.")},
+}
+
+
+def _coerce_entities(intent: str, entities: dict) -> dict:
+    """Returns the entities converted to the types the intent's handler expects. Raises ValueError with a user-facing message."""
+    entity_types = _INTENT_ENTITY_TYPES.get(intent)
+    if not entity_types:
+        return entities
+    coerced = dict(entities)
+    for name, (convert, error_message) in entity_types.items():
+        value = coerced.get(name)
+        if value is None:
+            continue
+        try:
+            coerced[name] = convert(value)
+        except (TypeError, ValueError):
+            raise ValueError(error_message) from None
+    return coerced
+
+
+def _check_create_file(entities: dict) -> str | None:
+    """Returns why a create_file request can't be attempted, or None if it can."""
+    filepath = entities.get("filepath")
+    if not filepath:
+        return "I need a filepath to create a file."
+    # Writing straight into the root of a drive ("C:/file.txt", "/file.txt") usually fails on permissions,
+    # so steer the user to their own folders instead of attempting it. The path is already normalized,
+    # so "/tmp/../file.txt" is caught as well.
+    if _ROOT_FILE_RE.match(filepath):
+        return (
+            f"Creating files directly in the root directory ('{os.path.dirname(filepath)}') "
+            "is often restricted. Please try specifying a path within your user folders "
+            "(e.g., 'Documents/my_file.txt' or 'my_file.txt' to save in your home directory)."
+        )
+    return None
+
+
+def _h_create_file(os_agent: OSInteraction, entities: dict) -> str:
+    problem = _check_create_file(entities)
+    if problem:
+        return problem
+    success, response_message = os_agent.create_file(
+        entities["filepath"], entities.get("content", ""), entities.get("file_type", "txt") # Default to txt
+    )
+    return response_message
+
+
+def _create_files(os_agent: OSInteraction, entities_list: list[dict]) -> str:
+    """Handles several create_file actions from one command with a single batched os_agent call."""
+    messages: list[str | None] = []
+    batch = []
+    for entities in entities_list:
+        entities = _resolve_path_entities(entities)
+        problem = _check_create_file(entities)
+        messages.append(problem)
+        if not problem:
+            batch.append((entities["filepath"], entities.get("content", ""), entities.get("file_type", "txt")))
+    results = iter(os_agent.create_files(batch))
+    messages = [message or next(results)[1] for message in messages]
+    return f"Handled {len(messages)} file requests:\n" + "\n".join(messages)
+
+
+def _h_create_directory(os_agent: OSInteraction, entities: dict) -> str:
+    dir_path = entities.get("dir_path")
+    if dir_path:
+        success, response_message = os_agent.create_directory(dir_path)
+    else:
+        response_message = "I need a directory path to create a directory."
+
+    return response_message
+
+
+def _h_delete_path(os_agent: OSInteraction, entities: dict) -> str:
+    path_to_delete = entities.get("path")
+    if path_to_delete:
+        success, response_message = os_agent.delete_path(path_to_delete)
+    else:
+        response_message = "I need a path to delete."
+
+    return response_message
+
+
+def _h_move_path(os_agent: OSInteraction, entities: dict) -> str:
+    source_path = entities.get("source_path")
+    destination_path = entities.get("destination_path")
+    if source_path and destination_path:
+        success, response_message = os_agent.move_path(source_path, destination_path)
+    else:
+        response_message = "I need both a source and a destination path to move."
+
+    return response_message
+
+
+def _h_list_directory_contents(os_agent: OSInteraction, entities: dict) -> str:
+    dir_path = entities.get("dir_path") or _resolve_path("~") # Default to home if not specified
+
+    success, result = os_agent.list_directory_contents(dir_path)
+    if success:
+        if isinstance(result, list):
+            response_message = f"Contents of {dir_path}:\n" + "\n".join(result)
+            if not result: response_message = f"The directory {dir_path} is empty."
+        else: # String message (e.g. dir not found, or is empty string)
+            response_message = result
+    else:
+        response_message = result # Error message from os_agent
+
+    return response_message
+
+
+def _h_execute_command(os_agent: OSInteraction, entities: dict) -> str:
+    command_str = entities.get("command_str")
+    shell_type = entities.get("shell_type") or _DEFAULT_SHELL
+
+    if command_str:
+        # SECURITY WARNING: Executing arbitrary commands is risky.
+        # Consider a more restrictive approach for production.
+        logger.warning(f"Executing potentially arbitrary command: {command_str} in {shell_type}")
+        # Output is printed as it arrives rather than collected, so long-running or chatty commands give
+        # feedback immediately and memory stays bounded; only the last lines are kept, for the response.
+        tail = collections.deque(maxlen=_COMMAND_TAIL_LINES)
+        line_count = 0
+        try:
+            for line in os_agent.execute_command_stream(command_str, shell_type):
+                print(line)
+                tail.append(line)
+                line_count += 1
+            status = "Command executed."
+        except subprocess.TimeoutExpired as e:
+            status = f"Command timed out after {e.timeout} seconds."
+        except subprocess.CalledProcessError as e:
+            status = f"Command failed with exit code {e.returncode}."
+        except OSError as e:
+            status = f"Command failed: {e}"
+        except (UnicodeError, ValueError) as e:
+            status = f"Command failed: {e}"
+        if not tail:
+            response_message = status
+        elif line_count > len(tail):
+            response_message = f"{status} Last {len(tail)} of {line_count} output lines:\n" + "\n".join(tail)
+        else:
+            response_message = f"{status} Output:\n" + "\n".join(tail)
+    else:
+        response_message = "I need a command to execute."
+
+    return response_message
+
+
+def _h_set_brightness(os_agent: OSInteraction, entities: dict) -> str:
+    level = entities.get("level") # Already an int, see _coerce_entities
+    if level is not None:
+        success, response_message = os_agent.set_brightness(level)
+    else:
+        response_message = "I need a brightness level."
+
+    return response_message
+
+
+def _h_set_volume(os_agent: OSInteraction, entities: dict) -> str:
+    level = entities.get("level") # Already a float, see _coerce_entities
+    if level is not None:
+        success, response_message = os_agent.set_volume(level)
+    else:
+        response_message = "I need a volume level."
+
+    return response_message
+
+
+def _h_os_unknown(os_agent: OSInteraction, entities: dict) -> str:
+    return "Sorry, I couldn't perform that OS action."
+
+
+# Intent -> handler, built once at import so dispatch is a single dict lookup instead of an if/elif chain
+_OS_HANDLERS: dict[str, Callable[[OSInteraction, dict], str]] = {
+    "create_file": _h_create_file,
+    "create_directory": _h_create_directory,
+    "delete_path": _h_delete_path,
+    "move_path": _h_move_path,
+    "list_directory_contents": _h_list_directory_contents,
+    "execute_command": _h_execute_command,
+    "set_brightness": _h_set_brightness,
+    "set_volume": _h_set_volume,
+}
+
+
+OS_INTENTS = frozenset(_OS_HANDLERS)
+
+
 def handle_os_interaction(os_agent: OSInteraction, intent: str, entities: dict) -> str:
     """Handles OS interaction based on intent and entities."""
-    response_message = "Sorry, I couldn't perform that OS action." # Default error
-    success = False
-
-    if intent == "create_file":
-        filepath = entities.get("filepath")
-        content = entities.get("content", "")
-        file_type = entities.get("file_type", "txt") # Default to txt
-        if filepath:
-            # Check for attempts to write to root of a drive (e.g., C:\file.txt)
-            # os.path.dirname("C:/file.txt") -> C:/
-            # os.path.abspath(os.sep) gives the root of the current drive, e.g. C:\
-            # A more direct check for "C:/file.txt" style paths:
-            path_obj = os.path.normpath(filepath) # Normalize (e.g. C:/file.txt -> C:\file.txt on Win)
-            # Check if the parent directory is the root directory.
-            # Example: dirname of 'C:\file.txt' is 'C:\'. For 'file.txt' it's ''.
-            # If os.path.dirname(path_obj) is 'C:\\' (Windows) or '/' (POSIX)
-            # This check is a bit simplistic, as user might not have typed C:/ but C:file.txt
-            # A better check is if the path starts with "X:\" or "X:/" and has no further subdirs for the file itself.
-
-            # Let's refine the check for root directory paths.
-            # A common problematic pattern is "C:/file.txt" or "/file.txt"
-            # os.path.splitdrive("C:/file.txt") -> ('C:', '/file.txt')
-            # os.path.splitdrive("/file.txt") -> ('', '/file.txt')
-            drive, tail = os.path.splitdrive(path_obj)
-            is_root_path_attempt = False
-            if drive and tail.startswith(os.sep) and len(tail.strip(os.sep).split(os.sep)) == 1:
-                 # e.g. C:\file.txt -> drive='C:', tail='\file.txt'
-                 # tail.strip(os.sep) -> 'file.txt'
-                 # tail.strip(os.sep).split(os.sep) -> ['file.txt']
-                 is_root_path_attempt = True
-            elif not drive and path_obj.startswith(os.sep) and len(path_obj.strip(os.sep).split(os.sep)) == 1:
-                # e.g. /file.txt (POSIX)
-                is_root_path_attempt = True
-
-            if is_root_path_attempt:
+    handler = _OS_HANDLERS.get(intent)
+    if handler is None:
+        return f"OS interaction for intent '{intent}' is not yet implemented."
+    # Every path entity is resolved and normalized once here, so the handlers get final paths
+    return handler(os_agent, _resolve_path_entities(entities))
+
+
+def _resolve_path_entities(entities: dict) -> dict:
+    """Returns the entities with every path entity resolved by _resolve_path (a copy, if any changed)."""
+    paths = {key: _resolve_path(entities[key]) for key in _PATH_ENTITIES if entities.get(key)}
+    return {**entities, **paths} if paths else entities
+
+
+class AgentUnavailableError(RuntimeError):
+    """Raised when an intent needs an agent that failed to initialize."""
+
+
+class Agents:
+    """The action agents handed to every intent handler. Each one is imported and created on first use."""
+    NAMES = ("os_agent", "app_agent", "media_agent", "web_agent")
+
+    def __init__(self):
+        self.failed: dict[str, Exception] = {}
+        self._instances: dict[str, object] = {}
+        # One lock per agent rather than functools.cached_property, whose lock (before Python 3.12) is shared
+        # by every instance and property and would make the concurrent warm-up create the agents one at a time.
+        self._locks = {name: threading.Lock() for name in self.NAMES}
+
+    def _check(self, name: str):
+        if name in self.failed:
+            raise AgentUnavailableError(name)
+
+    def _get(self, name: str, create: Callable[[], object]):
+        """Returns the named agent, creating it on first use. A caller that arrives mid-creation waits for it."""
+        agent = self._instances.get(name)
+        if agent is None:
+            with self._locks[name]:
+                agent = self._instances.get(name)
+                if agent is None:
+                    self._check(name)
+                    agent = self._instances[name] = create()
+        return agent
+
+    def warm_up(self, pool: concurrent.futures.Executor) -> list[concurrent.futures.Future]:
+        """
+        Creates all agents concurrently on the given pool. An agent that fails to initialize is
+        recorded in `failed` and disabled, instead of aborting startup for every other feature.
+        """
+        def create(name: str):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                logger.error(f"Failed to initialize {name}; features that need it are disabled: {e}")
+                self.failed[name] = e
+
+        return [pool.submit(create, name) for name in self.NAMES]
+
+    @property
+    def os_agent(self) -> OSInteraction:
+        def create():
+            from jarvis_assistant.modules.os_interaction import OSInteraction
+            return OSInteraction()
+        return self._get("os_agent", create)
+
+    @property
+    def app_agent(self) -> AppManager:
+        def create():
+            from jarvis_assistant.modules.app_manager import AppManager
+            return AppManager()
+        return self._get("app_agent", create)
+
+    @property
+    def media_agent(self) -> MediaController:
+        def create():
+            from jarvis_assistant.modules.media_controller import MediaController
+            return MediaController()
+        return self._get("media_agent", create)
+
+    @property
+    def web_agent(self) -> WebAutomator:
+        def create():
+            from jarvis_assistant.modules.web_automator import WebAutomator
+            return WebAutomator()
+        return self._get("web_agent", create)
+
+
+def _h_os(entities: dict, agents: Agents, text_command: str, intent: str) -> str:
+    return handle_os_interaction(agents.os_agent, intent, entities)
+
+
+def _h_open_app(entities: dict, agents: Agents, text_command: str) -> str:
+    app_agent = agents.app_agent
+    app_name = entities.get("app_name")
+    if app_name:
+        if app_agent.open_app(app_name):
+            response_message = f"Opening {app_name}."
+        else:
+            if _IS_WINDOWS:
+                if app_name.lower() == "microsoft store":
+                    response_message = "Opening the Microsoft Store programmatically is complex. You might need to open it manually or set up a custom shortcut in USER_APP_PATHS in config.py."
+                else:
+                    response_message = (
+                        f"Sorry, I couldn't open '{app_name}'. "
+                        "Please ensure it's installed and the name is correct. "
+                        "If it's a Microsoft Store app or in a non-standard location, "
+                        "you may need to add its specific launch command or full path "
+                        "to USER_APP_PATHS in the jarvis_assistant/config.py file. "
+                        "For Store apps, this might involve an 'explorer.exe shell:AppsFolder\\...' command."
+                    )
+            else: # Non-Windows OS
                 response_message = (
-                    f"Creating files directly in the root directory ('{os.path.dirname(path_obj)}') "
-                    "is often restricted. Please try specifying a path within your user folders "
-                    "(e.g., 'Documents/my_file.txt' or 'my_file.txt' to save in your home directory)."
+                    f"Sorry, I couldn't open '{app_name}'. "
+                    "Please ensure it's installed and the name is correct, or add its path "
+                    "to USER_APP_PATHS in the config.py file."
                 )
-                # No 'success = False' here, as os_agent.create_file isn't called yet.
-            else:
-                # Make paths relative to user's home directory if not absolute
-                # This logic should only apply if the path is NOT already absolute.
-                # The LLM might provide an absolute path like "C:\Users\user\Documents\file.txt"
-                # or a relative one like "my_folder/file.txt".
-                # If it's like "C:/file.txt", the above check should catch it.
-                # If it's like "jarvis_assistant/ttt.txt" as in the log, this should be handled.
-
-                # Original logic for expanding path:
-                # if not os.path.isabs(filepath):
-                #    filepath = os.path.expanduser(os.path.join("~", filepath))
-                # This assumes that a non-absolute path given by the LLM should always be relative to home.
-                # This seems reasonable. Let's ensure the original filepath is used for the is_root_path_attempt check.
-
-                # Re-evaluate path expansion:
-                # If `filepath` from LLM is like "C:/some/path/file.txt", it's absolute.
-                # If `filepath` is "my_docs/file.txt", it's relative.
-                # The `os.path.expanduser(os.path.join("~", filepath))` is good for relative paths.
-
-                # Use the original filepath from entities for the root check, then expand if not absolute.
-                processed_filepath = filepath
-                if not os.path.isabs(processed_filepath):
-                    # This will turn "file.txt" into "/Users/username/file.txt"
-                    # or "myfolder/file.txt" into "/Users/username/myfolder/file.txt"
-                    processed_filepath = os.path.expanduser(os.path.join("~", processed_filepath))
-
-                # Now, `processed_filepath` is absolute.
-                # The root check should have been done on the `filepath` as provided by LLM if it was intended as absolute.
-                # Or, if the LLM gave "C:/file.txt", `is_root_path_attempt` above handles it.
-                # If LLM gave "file.txt", it becomes "~/file.txt", which is fine.
-
-                # The issue arises if LLM gives "C:/file.txt", and we *don't* expand it to home.
-                # So, the `is_root_path_attempt` should be on the `filepath` *before* home expansion if it's absolute.
-                # And if it's relative, it will be expanded to home, which is usually safe.
-
-                # Let's simplify: if the original filepath from LLM is absolute AND is a root path, warn.
-                # Otherwise, if relative, expand to home. If absolute and not root, use as is.
-
-                final_filepath_to_use = filepath
-                if os.path.isabs(filepath):
-                    # Check if this absolute path is a root attempt
-                    drive_abs, tail_abs = os.path.splitdrive(os.path.normpath(filepath))
-                    if (drive_abs and tail_abs.startswith(os.sep) and len(tail_abs.strip(os.sep).split(os.sep)) == 1) or \
-                       (not drive_abs and filepath.startswith(os.sep) and len(filepath.strip(os.sep).split(os.sep)) == 1):
-                        response_message = (
-                            f"Creating files directly in a root directory like '{os.path.dirname(os.path.normpath(filepath))}' "
-                            "is often restricted due to permissions. Please try a path in your user folders, "
-                            "like 'Documents/my_file.txt', or just a filename to save in your home directory."
-                        )
-                        # success remains False by default
-                    else: # Absolute path, not root, use as is
-                        success, response_message = os_agent.create_file(final_filepath_to_use, content, file_type)
-                else: # Relative path, expand to home
-                    final_filepath_to_use = os.path.expanduser(os.path.join("~", filepath))
-                    success, response_message = os_agent.create_file(final_filepath_to_use, content, file_type)
-        else:
-            response_message = "I need a filepath to create a file."
-
-    elif intent == "create_directory":
-        dir_path = entities.get("dir_path")
-        if dir_path:
-            if not os.path.isabs(dir_path):
-                dir_path = os.path.expanduser(os.path.join("~", dir_path))
-            success, response_message = os_agent.create_directory(dir_path)
-        else:
-            response_message = "I need a directory path to create a directory."
-
-    elif intent == "delete_path":
-        path_to_delete = entities.get("path")
-        if path_to_delete:
-            if not os.path.isabs(path_to_delete):
-                path_to_delete = os.path.expanduser(os.path.join("~", path_to_delete))
-            success, response_message = os_agent.delete_path(path_to_delete)
-        else:
-            response_message = "I need a path to delete."
-
-    elif intent == "move_path":
-        source_path = entities.get("source_path")
-        destination_path = entities.get("destination_path")
-        if source_path and destination_path:
-            if not os.path.isabs(source_path):
-                source_path = os.path.expanduser(os.path.join("~", source_path))
-            if not os.path.isabs(destination_path):
-                destination_path = os.path.expanduser(os.path.join("~", destination_path))
-            success, response_message = os_agent.move_path(source_path, destination_path)
-        else:
-            response_message = "I need both a source and a destination path to move."
-
-    elif intent == "list_directory_contents":
-        dir_path = entities.get("dir_path", "~") # Default to home if not specified
-        if not os.path.isabs(dir_path) and dir_path != "~":
-             dir_path = os.path.expanduser(os.path.join("~", dir_path))
-        elif dir_path == "~":
-            dir_path = os.path.expanduser("~")
-
-        success, result = os_agent.list_directory_contents(dir_path)
-        if success:
-            if isinstance(result, list):
-                response_message = f"Contents of {dir_path}:\n" + "\n".join(result)
-                if not result: response_message = f"The directory {dir_path} is empty."
-            else: # String message (e.g. dir not found, or is empty string)
-                response_message = result
+    else:
+        response_message = "Which application would you like to open?"
+    return response_message
+
+
+def _h_close_app(entities: dict, agents: Agents, text_command: str) -> str:
+    app_agent = agents.app_agent
+    app_name = entities.get("app_name")
+    if app_name:
+        if app_agent.close_app(app_name):
+            response_message = f"Attempting to close {app_name}."
         else:
-            response_message = result # Error message from os_agent
-
-    elif intent == "execute_command":
-        command_str = entities.get("command_str")
-        shell_type = entities.get("shell_type")
-        if os.name == 'nt' and not shell_type:
-            shell_type = "cmd"
-        elif os.name != 'nt' and not shell_type:
-            shell_type = "sh"
-
-        if command_str:
-            # SECURITY WARNING: Executing arbitrary commands is risky.
-            # Consider a more restrictive approach for production.
-            logger.warning(f"Executing potentially arbitrary command: {command_str} in {shell_type}")
-            success, output = os_agent.execute_command(command_str, shell_type)
-            response_message = f"Command executed. Output:\n{output}" if success else f"Command failed:\n{output}"
+            response_message = f"Sorry, I couldn't close {app_name} or it wasn't running."
+    else:
+        response_message = "Which application would you like to close?"
+    return response_message
+
+
+def _h_open_website(entities: dict, agents: Agents, text_command: str) -> str:
+    web_agent = agents.web_agent
+    url = entities.get("url")
+    if url:
+        if web_agent.open_website(url):
+            response_message = f"Opening {url}."
         else:
-            response_message = "I need a command to execute."
+            response_message = f"Sorry, I couldn't open {url}."
+    else:
+        response_message = "Which website would you like to open?"
+    return response_message
 
-    elif intent == "set_brightness":
-        level = entities.get("level")
-        if level is not None:
-            try:
-                level = int(level)
-                success, response_message = os_agent.set_brightness(level)
-            except ValueError:
-                response_message = "Brightness level must be an integer."
+
+def _h_search_info(entities: dict, agents: Agents, text_command: str) -> str:
+    web_agent = agents.web_agent
+    query = entities.get("query")
+    summarize = entities.get("summarize", False) # Default to False
+    if query:
+        search_result = web_agent.search_info(query, summarize)
+        if summarize:
+            response_message = f"Here's what I found about {query}: {search_result}"
         else:
-            response_message = "I need a brightness level."
+            response_message = f"I've opened a browser tab with search results for {query}."
+            # search_result here is the URL, could also say "You can find it at {search_result}"
+    else:
+        response_message = "What would you like me to search for?"
+    return response_message
 
-    elif intent == "set_volume":
-        level = entities.get("level")
-        if level is not None:
-            try:
-                level = float(level)
-                success, response_message = os_agent.set_volume(level)
-            except ValueError:
-                response_message = "Volume level must be a number (e.g., 0.5 for 50%)."
+
+def _h_media(entities: dict, agents: Agents, text_command: str, action: str) -> str:
+    """Shared handler for the media_* intents; `action` is the MediaController method to call."""
+    player_name = entities.get("player_name", "default")
+    if action == "play":
+        success, msg = agents.media_agent.play(player_name, entities.get("track_or_playlist"))
+    else:
+        success, msg = getattr(agents.media_agent, action)(player_name)
+    return msg
+
+
+def _faq_known_apps(agents: Agents) -> str:
+    return (
+        "I can try to open applications I know by default, like Notepad, Calculator, Chrome, Firefox, and a generic 'browser'. "
+        f"Currently, my full list of recognized app names includes: {agents.app_agent.known_apps_str}. "
+        "You can also teach me new ones by adding their full path to USER_APP_PATHS in the config.py file. "
+        "What app would you like to open?"
+    )
+
+
+def _faq_languages(agents: Agents) -> str:
+    return "I understand commands in English, and my responses are currently in English. Support for speaking other languages like Hebrew is not yet implemented."
+
+
+# Canned answers for general queries: trigger pattern -> responder. All triggers are compiled into one
+# alternation so a query is scanned once however many entries there are; the first trigger found wins.
+_FAQ_RESPONSES: list[tuple[str, Callable[[Agents], str]]] = [
+    (r"\b(?:which|what) apps can you open\b", _faq_known_apps),
+    (r"\bcan you speak\b.*\bhebrew\b|\bhebrew\b.*\bcan you speak\b", _faq_languages),
+]
+_FAQ_RE = re.compile(
+    "|".join(f"(?P<faq{i}>{pattern})" for i, (pattern, _) in enumerate(_FAQ_RESPONSES)), re.IGNORECASE
+)
+
+
+def _h_general_query(entities: dict, agents: Agents, text_command: str) -> str:
+    # For general queries, we might just pass the query text back to the LLM
+    # or handle simple ones like "what time is it?" directly.
+    # For now, just echo what the LLM might say or a generic response.
+    query_text = entities.get("query_text", text_command)
+    # This could be another LLM call for a conversational response
+    match = _FAQ_RE.search(query_text)
+    if match:
+        return _FAQ_RESPONSES[int(match.lastgroup[3:])][1](agents)
+    return f"Regarding your query: {query_text}... I'm still learning to handle general conversation."
+
+
+def _h_summarize_text(entities: dict, agents: Agents, text_command: str) -> str:
+    os_agent = agents.os_agent
+    filepath = entities.get("filepath")
+    source_url = entities.get("source_url")
+    text_to_summarize = entities.get("text_to_summarize")
+
+    if filepath:
+        # Resolve path relative to home if not absolute
+        filepath = _resolve_path(filepath)
+
+        # Only the head of the file is needed for the snippet; a little over 500 bytes covers 500 chars of mostly-ASCII text
+        success_read, content_or_error, truncated = os_agent.read_file_head(filepath, max_bytes=600)
+        if success_read:
+            # For now, just present a snippet as "reading"
+            # TTS might struggle with very long content.
+            snippet = content_or_error[:500] # Read first 500 chars
+            response_message = f"Here's the beginning of the file '{os.path.basename(filepath)}':\n{snippet}"
+            if truncated or len(content_or_error) > 500:
+                response_message += "\n\n(The file is longer, I've read the first part.)"
         else:
-            response_message = "I need a volume level."
+            response_message = content_or_error # This will be the error message from read_file_content
+    elif source_url:
+        # This would be where web_agent.summarize_url(source_url) or similar is called
+        response_message = f"I would summarize {source_url}, but web page summarization needs to be fully connected."
+        # Placeholder: content = web_agent.fetch_page_content(source_url)
+        # if content: response_message = web_agent.summarize_text_content(content) else: ...
+    elif text_to_summarize:
+        # This would be web_agent.summarize_text_content(text_to_summarize)
+        response_message = "I would summarize the text you provided, but text summarization needs to be fully connected."
     else:
-        response_message = f"OS interaction for intent '{intent}' is not yet implemented."
+        response_message = "I need a file path, a URL, or some text to summarize."
+    return response_message
 
+
+def _h_unknown(entities: dict, agents: Agents, text_command: str) -> str:
+    response_message = "I'm not sure how to handle that command. Could you try rephrasing?"
+    if "error" in entities: # If LLM itself had an issue producing JSON
+        response_message += f" (Parser error: {entities['error']})"
     return response_message
 
 
+def _h_todo(entities: dict, agents: Agents, text_command: str, intent: str) -> str:
+    return f"I understood the intent as '{intent}', but I don't know how to do that yet."
+
+
+_INTENT_HANDLERS: dict[str, Callable[[dict, Agents, str], str]] = {
+    # OS intents share one handler that forwards to handle_os_interaction
+    **{intent: functools.partial(_h_os, intent=intent) for intent in OS_INTENTS},
+    "open_app": _h_open_app,
+    "close_app": _h_close_app,
+    "open_website": _h_open_website,
+    "search_info": _h_search_info,
+    "media_play": functools.partial(_h_media, action="play"),
+    "media_pause": functools.partial(_h_media, action="pause"),
+    "media_skip": functools.partial(_h_media, action="skip_track"),
+    "media_previous": functools.partial(_h_media, action="previous_track"),
+    "general_query": _h_general_query,
+    "summarize_text": _h_summarize_text,
+    "unknown": _h_unknown,
+}
+
+
+def dispatch_intent(intent: str, entities: dict, agents: Agents, text_command: str) -> str:
+    """Routes a parsed command to its handler and returns the message to speak."""
+    handler = _INTENT_HANDLERS.get(intent)
+    if handler is None:
+        return _h_todo(entities, agents, text_command, intent)
+    try:
+        return handler(entities, agents, text_command)
+    except AgentUnavailableError as e:
+        return f"Sorry, that feature is unavailable because {e} failed to start. Please check the logs."
+
+
+def _coerced_action(parsed_action: dict) -> tuple[str, dict]:
+    """Returns (intent, entities) for a parsed action, with entity values converted to the types handlers expect."""
+    intent = parsed_action.get("intent", "unknown")
+    entities = parsed_action.get("entities", {})
+    try:
+        entities = _coerce_entities(intent, entities)
+    except ValueError as e:
+        logger.warning(f"Invalid entities for intent '{intent}': {entities}")
+        intent, entities = "unknown", {"error": str(e)}
+    return intent, entities
+
+
+def dispatch_actions(actions: list[tuple[str, dict]], agents: Agents, text_command: str) -> str:
+    """
+    Runs the (intent, entities) actions parsed from one command, in order, and returns their combined
+    response. Consecutive create_file actions ("create a.txt, b.txt and c.txt") are handled as one batch.
+    """
+    responses = []
+    for intent, group in itertools.groupby(actions, key=lambda action: action[0]):
+        entities_list = [entities for _, entities in group]
+        if intent == "create_file" and len(entities_list) > 1:
+            try:
+                responses.append(_create_files(agents.os_agent, entities_list))
+            except AgentUnavailableError as e:
+                responses.append(f"Sorry, that feature is unavailable because {e} failed to start. Please check the logs.")
+        else:
+            responses.extend(dispatch_intent(intent, entities, agents, text_command) for entities in entities_list)
+    return "\n".join(responses)
+
+
+def _listen_with_early_commit(recognizer, parser) -> tuple[str | None, dict | None]:
+    """
+    Listens for one spoken command, acting on interim transcripts when possible. Once two consecutive
+    partials parse locally to the same confident result, the command is committed and later updates
+    to the utterance are ignored. Otherwise the final transcript is returned for the normal parse.
+    Returns (text, parsed_action), where parsed_action is None unless committed early.
+    """
+    previous = None
+    for text, is_final in recognizer.stream_listen():
+        if is_final:
+            return text, None
+        prefix = parser.prefix_parse(text)
+        if prefix is None or prefix[1] < _EARLY_COMMIT_CONFIDENCE:
+            previous = None
+            continue
+        if prefix == previous: # Stable across two partials, like LocalAgreement-2
+            intent, _, entities = prefix
+            logger.info(f"Committed '{text}' as '{intent}' before the transcript was final.")
+            return text, {"intent": intent, "entities": entities}
+        previous = prefix
+    return None, None
+
+
+class _NullTTS:
+    """Stands in for TextToSpeech until it is initialized, so shutdown paths can always call it."""
+    def speak(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _create_recognizer() -> SpeechRecognizer:
+    from jarvis_assistant.core.speech_recognizer import SpeechRecognizer
+    return SpeechRecognizer()
+
+
+def _prime_recognizer() -> concurrent.futures.Future:
+    """Starts creating the SpeechRecognizer (microphone open + ambient calibration) on a background thread."""
+    future = concurrent.futures.Future()
+
+    def prime():
+        try:
+            future.set_result(_create_recognizer())
+        except BaseException as e:
+            future.set_exception(e)
+
+    # Daemon thread: exiting never waits for the audio device or a model load
+    threading.Thread(target=prime, name="MicPrime", daemon=True).start()
+    return future
+
+
+def _expects_speech() -> bool:
+    """True if speech input is configured (PREFERRED_INPUT_METHOD) or was used in the previous session."""
+    if PREFERRED_INPUT_METHOD is not None:
+        return PREFERRED_INPUT_METHOD == "s"
+    try:
+        with open(_LAST_INPUT_METHOD_PATH, encoding="utf-8") as f:
+            return f.read().strip() == "s"
+    except OSError:
+        return False
+
+
+def _remember_input_method(method: str):
+    """Records the input method for the next session's _expects_speech()."""
+    try:
+        os.makedirs(os.path.dirname(_LAST_INPUT_METHOD_PATH), exist_ok=True)
+        with open(_LAST_INPUT_METHOD_PATH, "w", encoding="utf-8") as f:
+            f.write(method)
+    except OSError as e:
+        logger.debug(f"Could not save the input method: {e}")
+
+
+def _choose_input_method() -> tuple[str, str | None] | None:
+    """
+    Asks in the console whether commands will be spoken ("s") or typed ("t"). Returns (method, typed_command),
+    where typed_command is a command typed on the same line ("t open notepad"), or None on EOF.
+    """
+    while True:
+        try:
+            # Prompting in the console, not via TTS, as this is a pre-command setup
+            raw_choice = input("Choose input method: Speak (s) or Type (t), then press Enter: ").strip().lower()
+        except EOFError:
+            return None
+        if raw_choice and raw_choice[0] in _INPUT_CHOICES and (len(raw_choice) == 1 or raw_choice[1] == " "):
+            return raw_choice[0], (raw_choice[1:].lstrip() or None if raw_choice[0] == "t" else None)
+        print("Invalid choice. Please enter 's' or 't'. You can switch later by saying \"switch to voice\" or \"switch to text\".")
+
+
 def main_loop():
     logger.info("J.A.R.V.I.S. Assistant Initializing...")
+    tts = _NullTTS() # Replaced by TextToSpeech once speech output is up; lets every call site skip a None check
 
     if not GEMINI_API_KEY or GEMINI_API_KEY == "YOUR_GEMINI_API_KEY":
         logger.error("Gemini API key not configured. Please set it in jarvis_assistant/config.py and restart.")
@@ -214,13 +707,24 @@ def main_loop():
         return
 
     try:
-        recognizer = SpeechRecognizer()
-        tts = TextToSpeech()
-        parser = CommandParser()
-        os_agent = OSInteraction()
-        app_agent = AppManager()
-        media_agent = MediaController()
-        web_agent = WebAutomator() # Initialize WebAutomator
+        from jarvis_assistant.core.text_to_speech import TextToSpeech
+        from jarvis_assistant.core.command_parser import get_parser
+        agents = Agents()
+        # The components are independent and mostly wait on I/O (audio devices, API setup), so create them
+        # concurrently: startup takes about as long as the slowest one instead of the sum.
+        # Only speech and the parser are waited for; the agents finish warming up in the background, and a
+        # command that needs one still being created waits for that one alone (see Agents._get).
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=6)
+        tts_future = pool.submit(TextToSpeech) # Submitted first: "online" is spoken as soon as it is ready
+        parser_future = pool.submit(get_parser)
+        agents.warm_up(pool)
+        pool.shutdown(wait=False)
+        tts = tts_future.result()
+        parser = parser_future.result()
+        # Connects to the LLM API while the user is still choosing an input method, and keeps the connection warm
+        parser.keep_warm()
+        recognizer = None # Created the first time speech input is used
+        recognizer_future = None
         logger.info("Core components initialized.")
         tts.speak("J.A.R.V.I.S. online and ready.")
     except ValueError as ve:
@@ -233,33 +737,44 @@ def main_loop():
         return
 
     try:
+        if _expects_speech():
+            # Open and calibrate the microphone while the user is still reading the prompt, so choosing speech
+            # doesn't start with a cold audio device. If text is chosen, it stays ready for "switch to voice".
+            recognizer_future = _prime_recognizer()
+        # The input method is chosen once per session; "switch to voice"/"switch to text" changes it later
+        choice = _choose_input_method()
+        if choice is None:
+            logger.info("EOF received during input mode selection, treating as exit.")
+            tts.speak("Exiting.")
+            return # Exit main_loop
+        command_input_method, typed_command = choice # "t open notepad" types the first command on the same line
+        _remember_input_method(command_input_method)
+
         while True:
             logger.info("Starting new listening cycle.")
-            # Default to voice input. Text input can be a fallback or configurable option.
-            # For now, we'll set it directly to "voice".
-            # A more advanced setup might use a config variable from config.py
-            # command_input_method = "voice" # Defaulting to voice
-
-            command_input_method = ""
-            while command_input_method not in ['s', 't']:
-                try:
-                    # Prompting in the console, not via TTS, as this is a pre-command setup
-                    raw_choice = input("Choose input method: Speak (s) or Type (t), then press Enter: ").lower()
-                    if raw_choice in ['s', 't']:
-                        command_input_method = raw_choice
-                    else:
-                        print("Invalid choice. Please enter 's' or 't'.")
-                except EOFError:
-                    logger.info("EOF received during input mode selection, treating as exit.")
-                    tts.speak("Exiting.")
-                    return # Exit main_loop
-
-
             text_command = None
+            early_parsed_action = None
             if command_input_method == "s": # Speech input
                 logger.info("Listening for voice command...")
+                if recognizer is None and recognizer_future is None:
+                    # Open and calibrate the microphone while the prompt below is being spoken
+                    recognizer_future = _prime_recognizer()
+                # Let the previous reply finish, then the prompt: speech is asynchronous, and the microphone
+                # must not pick it up. Nothing has been said yet, so this is not a barge-in.
                 tts.speak("Listening...")
-                text_command = recognizer.listen()
+                tts.flush()
+                if recognizer is None:
+                    try:
+                        recognizer = recognizer_future.result()
+                    except Exception as e: # No microphone, audio device errors, STT model load failures
+                        recognizer_future = None # Tried again on the next "switch to voice"
+                        logger.error(f"Speech input unavailable: {e}")
+                        print(f"Speech input unavailable: {e}")
+                        tts.speak("Speech input is unavailable. Switching to text input.")
+                        command_input_method = "t"
+                        _remember_input_method(command_input_method) # Don't prime a missing microphone next time
+                        continue
+                text_command, early_parsed_action = _listen_with_early_commit(recognizer, parser)
                 if text_command:
                     logger.info(f"Voice command received: {text_command}")
                 else:
@@ -268,7 +783,10 @@ def main_loop():
                     continue # Skip processing if no command heard
             else: # Text input mode (command_input_method == "t")
                 try:
-                    text_command = input("הקלד פקודה: ") # "Type command: " in Hebrew as per user log
+                    text_command = typed_command or input("הקלד פקודה: ") # "Type command: " in Hebrew as per user log
+                    typed_command = None
+                    if text_command:
+                        tts.stop() # Barge-in: a new command arrived, cut off the previous response
                 except EOFError:
                     logger.info("EOF received, treating as exit command.")
                     text_command = "exit jarvis" # Or handle exit more directly
@@ -277,190 +795,76 @@ def main_loop():
                     tts.speak("Exiting.")
                     return # Exit main_loop
 
+            switch = _SWITCH_MODE_RE.match(text_command) if text_command else None
+            if switch:
+                if switch.group(1):
+                    command_input_method = _MODE_WORDS[switch.group(1).lower()]
+                else:
+                    choice = _choose_input_method()
+                    if choice is None:
+                        logger.info("EOF received during input mode selection, treating as exit.")
+                        tts.speak("Exiting.")
+                        return # Exit main_loop
+                    command_input_method, typed_command = choice
+                logger.info(f"Input method switched to '{command_input_method}'.")
+                _remember_input_method(command_input_method)
+                tts.speak("Voice input." if command_input_method == "s" else "Text input.")
+                continue
+
             if text_command: # Proceed only if a command was actually received
                 logger.info(f"Recognized command: {text_command}")
                 tts.speak(f"Processing: {text_command}")
 
-                if "exit jarvis" in text_command or "quit jarvis" in text_command:
+                if _EXIT_RE.search(text_command):
                     logger.info("Exit command received. Shutting down.")
                     tts.speak("Goodbye!")
                     break
 
                 # Get parsed command/action from LLM
-                parsed_action = parser.parse_command(text_command)
+                parsed_action = early_parsed_action or parser.parse_command(text_command)
                 logger.info(f"LLM parsed action: {parsed_action}")
 
-                intent = parsed_action.get("intent", "unknown")
-                entities = parsed_action.get("entities", {})
+                # A command asking for several things comes back with all of them in "actions"
+                actions = [_coerced_action(action) for action in parsed_action.get("actions") or [parsed_action]]
+                exit_requested = any(intent == "exit" for intent, _ in actions)
+                actions = [action for action in actions if action[0] != "exit"]
+
+                if actions:
+                    response_message = dispatch_actions(actions, agents, text_command)
 
-                response_message = ""
+                    logger.info(f"Response to user: {response_message}")
+                    spoken_message = _speakable(response_message)
+                    if spoken_message != response_message:
+                        print(response_message)
+                    tts.speak(spoken_message)
 
-                if intent == "exit":
+                if exit_requested:
                     logger.info("Exit intent recognized by LLM. Shutting down.")
                     response_message = "Goodbye!"
                     tts.speak(response_message)
                     break
 
-                # OS Interaction Intents
-                elif intent in [
-                    "create_file", "create_directory", "delete_path", # Updated create_text_file to create_file
-                    "move_path", "list_directory_contents", "execute_command",
-                    "set_brightness", "set_volume"
-                ]:
-                    response_message = handle_os_interaction(os_agent, intent, entities)
-
-                # Placeholder for other intent categories (App, Web, Media)
-                elif intent == "open_app":
-                    app_name = entities.get("app_name")
-                    if app_name:
-                        if app_agent.open_app(app_name):
-                            response_message = f"Opening {app_name}."
-                        else:
-                            if os.name == 'nt':
-                                if app_name.lower() == "microsoft store":
-                                    response_message = "Opening the Microsoft Store programmatically is complex. You might need to open it manually or set up a custom shortcut in USER_APP_PATHS in config.py."
-                                else:
-                                    response_message = (
-                                        f"Sorry, I couldn't open '{app_name}'. "
-                                        "Please ensure it's installed and the name is correct. "
-                                        "If it's a Microsoft Store app or in a non-standard location, "
-                                        "you may need to add its specific launch command or full path "
-                                        "to USER_APP_PATHS in the jarvis_assistant/config.py file. "
-                                        "For Store apps, this might involve an 'explorer.exe shell:AppsFolder\\...' command."
-                                    )
-                            else: # Non-Windows OS
-                                response_message = (
-                                    f"Sorry, I couldn't open '{app_name}'. "
-                                    "Please ensure it's installed and the name is correct, or add its path "
-                                    "to USER_APP_PATHS in the config.py file."
-                                )
-                    else:
-                        response_message = "Which application would you like to open?"
-                elif intent == "close_app":
-                    app_name = entities.get("app_name")
-                    if app_name:
-                        if app_agent.close_app(app_name):
-                            response_message = f"Attempting to close {app_name}."
-                        else:
-                            response_message = f"Sorry, I couldn't close {app_name} or it wasn't running."
-                    else:
-                        response_message = "Which application would you like to close?"
-                elif intent == "open_website":
-                    url = entities.get("url")
-                    if url:
-                        if web_agent.open_website(url):
-                            response_message = f"Opening {url}."
-                        else:
-                            response_message = f"Sorry, I couldn't open {url}."
-                    else:
-                        response_message = "Which website would you like to open?"
-                elif intent == "search_info":
-                    query = entities.get("query")
-                    summarize = entities.get("summarize", False) # Default to False
-                    if query:
-                        search_result = web_agent.search_info(query, summarize)
-                        if summarize:
-                            response_message = f"Here's what I found about {query}: {search_result}"
-                        else:
-                            response_message = f"I've opened a browser tab with search results for {query}."
-                            # search_result here is the URL, could also say "You can find it at {search_result}"
-                    else:
-                        response_message = "What would you like me to search for?"
-                elif intent == "media_play":
-                    player_name = entities.get("player_name", "default")
-                    track_or_playlist = entities.get("track_or_playlist")
-                    success, msg = media_agent.play(player_name, track_or_playlist)
-                    response_message = msg
-                elif intent == "media_pause":
-                    player_name = entities.get("player_name", "default")
-                    success, msg = media_agent.pause(player_name)
-                    response_message = msg
-                elif intent == "media_skip":
-                    player_name = entities.get("player_name", "default")
-                    success, msg = media_agent.skip_track(player_name)
-                    response_message = msg
-                elif intent == "media_previous":
-                    player_name = entities.get("player_name", "default")
-                    success, msg = media_agent.previous_track(player_name)
-                    response_message = msg
-                elif intent == "general_query":
-                    # For general queries, we might just pass the query text back to the LLM
-                    # or handle simple ones like "what time is it?" directly.
-                    # For now, just echo what the LLM might say or a generic response.
-                    query_text = entities.get("query_text", text_command)
-                    # This could be another LLM call for a conversational response
-                    query_text_lower = query_text.lower()
-                    if "which apps can you open" in query_text_lower or "what apps can you open" in query_text_lower:
-                        known_apps = list(app_agent.app_map.keys())
-                        response_message = (
-                            "I can try to open applications I know by default, like Notepad, Calculator, Chrome, Firefox, and a generic 'browser'. "
-                            f"Currently, my full list of recognized app names includes: {', '.join(known_apps)}. "
-                            "You can also teach me new ones by adding their full path to USER_APP_PATHS in the config.py file. "
-                            "What app would you like to open?"
-                        )
-                    elif "can you speak" in query_text_lower and "hebrew" in query_text_lower:
-                        response_message = "I understand commands in English, and my responses are currently in English. Support for speaking other languages like Hebrew is not yet implemented."
-                    else:
-                        response_message = f"Regarding your query: {query_text}... I'm still learning to handle general conversation."
-                elif intent == "summarize_text":
-                    filepath = entities.get("filepath")
-                    source_url = entities.get("source_url")
-                    text_to_summarize = entities.get("text_to_summarize")
-
-                    if filepath:
-                        # Resolve path relative to home if not absolute
-                        if not os.path.isabs(filepath):
-                            filepath = os.path.expanduser(os.path.join("~", filepath))
-
-                        success_read, content_or_error = os_agent.read_file_content(filepath)
-                        if success_read:
-                            # For now, just present a snippet as "reading"
-                            # TTS might struggle with very long content.
-                            snippet = content_or_error[:500] # Read first 500 chars
-                            response_message = f"Here's the beginning of the file '{os.path.basename(filepath)}':\n{snippet}"
-                            if len(content_or_error) > 500:
-                                response_message += "\n\n(The file is longer, I've read the first part.)"
-                        else:
-                            response_message = content_or_error # This will be the error message from read_file_content
-                    elif source_url:
-                        # This would be where web_agent.summarize_url(source_url) or similar is called
-                        response_message = f"I would summarize {source_url}, but web page summarization needs to be fully connected."
-                        # Placeholder: content = web_agent.fetch_page_content(source_url)
-                        # if content: response_message = web_agent.summarize_text_content(content) else: ...
-                    elif text_to_summarize:
-                        # This would be web_agent.summarize_text_content(text_to_summarize)
-                        response_message = "I would summarize the text you provided, but text summarization needs to be fully connected."
-                    else:
-                        response_message = "I need a file path, a URL, or some text to summarize."
-
-                elif intent == "unknown":
-                    response_message = "I'm not sure how to handle that command. Could you try rephrasing?"
-                    if "error" in entities: # If LLM itself had an issue producing JSON
-                        response_message += f" (Parser error: {entities['error']})"
-                else:
-                    response_message = f"I understood the intent as '{intent}', but I don't know how to do that yet."
-
-                logger.info(f"Response to user: {response_message}")
-                tts.speak(response_message)
-
             else:
                 # logger.info("No command recognized or error in recognition.")
                 # tts.speak("Sorry, I didn't catch that. Could you please repeat?")
                 # No command, or error already logged by recognizer.listen()
                 pass
 
-            time.sleep(0.1) # Small delay to prevent tight looping if mic issues
-
     except KeyboardInterrupt:
         logger.info("User interrupted the main loop. Shutting down.")
-        if 'tts' in locals(): # Check if tts was initialized
-            tts.speak("Shutting down due to user request.")
+        tts.speak("Shutting down due to user request.")
     except Exception as e:
         logger.error(f"An unexpected error occurred in the main loop: {e}", exc_info=True)
-        if 'tts' in locals():
-            tts.speak("An critical error occurred. Please check the logs.")
+        tts.speak("An critical error occurred. Please check the logs.")
     finally:
         logger.info("J.A.R.V.I.S. Assistant shutting down.")
+        tts.flush() # Let the final message ("Goodbye!", "Exiting.") finish before the process exits
 
 if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="J.A.R.V.I.S. voice assistant")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="send every command to the LLM instead of reusing cached parses (same as JARVIS_LLM_CACHE=0)")
+    if arg_parser.parse_args().no_cache:
+        os.environ["JARVIS_LLM_CACHE"] = "0" # Read when the parser's cache is created
     main_loop()
@@ -1,4 +1,5 @@
 # Opens and closes applications
+import functools
 import os
 import shutil # Required for shutil.which
 import subprocess
@@ -39,6 +40,18 @@ class AppManager:
         self.app_map = {**self.default_app_map, **USER_APP_PATHS}
         self.logger.info(f"AppManager initialized. Combined app map: {self.app_map}")
 
+    @functools.cached_property
+    def known_apps_str(self) -> str:
+        """
+        Comma-separated, alphabetical names of all apps in app_map, built once.
+        Call _app_map_changed() after mutating app_map (e.g. reloading USER_APP_PATHS).
+        """
+        return ", ".join(sorted(self.app_map))
+
+    def _app_map_changed(self):
+        """Drops the cached known_apps_str so it is rebuilt from the current app_map."""
+        self.__dict__.pop("known_apps_str", None)
+
 
     def _find_app_path(self, app_name: str) -> str | None:
         """
@@ -1,8 +1,13 @@
 # Manages files, folders, executes CMD/PowerShell, controls system settings
 
+import codecs
+import locale
 import os
 import shutil
+import signal
 import subprocess
+import threading
+from typing import Iterator
 from jarvis_assistant.utils.logger import get_logger # Corrected import path
 
 # Ensure get_logger can be found if this module is run standalone for testing
@@ -17,6 +22,8 @@ if __name__ == '__main__' and __package__ is None:
 
 
 class OSInteraction:
+    COMMAND_TIMEOUT_SECONDS = 30
+
     def __init__(self):
         self.logger = get_logger(self.__class__.__name__)
         # Initialize any OS-specific components here if needed
@@ -85,17 +92,18 @@ class OSInteraction:
             self.logger.error(message)
             return False, message
 
-    def create_file(self, filepath: str, content: str = "", file_type: str = "txt") -> tuple[bool, str]:
+    def create_file(self, filepath: str, content: str = "", file_type: str = "txt", make_dirs: bool = True) -> tuple[bool, str]:
         """
         Creates a file with the given content.
         For 'document', it creates a .txt file but logs it as a document placeholder.
         For 'spreadsheet', it creates a .csv file but logs it as a spreadsheet placeholder.
         Actual .docx or .xlsx creation would require dedicated libraries.
+        Pass make_dirs=False if the parent directory is known to exist.
         """
         try:
             # Ensure the directory exists for the file
             dir_name = os.path.dirname(filepath)
-            if dir_name:  # If filepath includes a directory
+            if dir_name and make_dirs:  # If filepath includes a directory
                 os.makedirs(dir_name, exist_ok=True)
 
             actual_filepath = filepath
@@ -131,34 +139,96 @@ class OSInteraction:
             self.logger.error(message)
             return False, message
 
+    def create_files(self, files: list[tuple[str, str, str]]) -> list[tuple[bool, str]]:
+        """
+        Creates several files, given as (filepath, content, file_type) tuples, e.g. from one spoken
+        command naming several files. Each parent directory is created once for the whole batch.
+        Returns one (success, message) per file, in order; a failure doesn't stop the others.
+        """
+        ready_dirs = {""}
+        for dir_name in {os.path.dirname(filepath) for filepath, _, _ in files} - ready_dirs:
+            try:
+                os.makedirs(dir_name, exist_ok=True)
+                ready_dirs.add(dir_name)
+            except OSError:
+                pass # Left to create_file, which reports the error for each affected file
+        return [
+            self.create_file(filepath, content, file_type, make_dirs=os.path.dirname(filepath) not in ready_dirs)
+            for filepath, content, file_type in files
+        ]
+
     def read_file_content(self, filepath: str) -> tuple[bool, str]:
         """Reads the content of a file."""
+        success, content, _ = self._read_file(filepath)
+        return success, content
+
+    def read_file_head(self, filepath: str, max_bytes: int) -> tuple[bool, str, bool]:
+        """
+        Reads at most max_bytes from the start of a file, so previewing a huge file doesn't load all of it.
+        Returns (success, content or error message, truncated), where truncated means the file is longer.
+        Text that isn't valid UTF-8 is decoded with the system's preferred encoding instead of failing.
+        """
+        return self._read_file(filepath, max_bytes)
+
+    def _read_file(self, filepath: str, max_bytes: int | None = None) -> tuple[bool, str, bool]:
         self.logger.info(f"Attempting to read file: {filepath}")
         try:
             if not os.path.isfile(filepath):
                 message = f"Error: File not found at {filepath}"
                 self.logger.warning(message)
-                return False, message
+                return False, message, False
 
             # Expand user path just in case it wasn't done before, though typically it should be.
             filepath = os.path.expanduser(filepath)
 
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.logger.info(f"Successfully read file: {filepath}")
-            return True, content
+            with open(filepath, 'rb') as f:
+                if max_bytes is None:
+                    data = f.read()
+                    truncated = False
+                else:
+                    data = f.read(max_bytes)
+                    truncated = bool(f.read(1))
+            try:
+                if truncated:
+                    # The cut may fall inside a multi-byte character; a non-final decode drops the partial tail
+                    content = codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+                else:
+                    content = data.decode('utf-8')
+            except UnicodeDecodeError:
+                if max_bytes is None:
+                    raise
+                # A preview of a non-UTF-8 file (e.g. a cp1252 text file on Windows) is still useful: fall back to the
+                # system's encoding, replacing anything that doesn't decode
+                content = data.decode(locale.getpreferredencoding(False), errors='replace')
+            # Text-mode reads translated newlines; keep returning the same text
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+            self.logger.info(f"Successfully read file: {filepath}" + (f" (first {len(data)} bytes)" if truncated else ""))
+            return True, content, truncated
         except FileNotFoundError: # Double check after expanduser, though os.path.isfile should catch it.
             message = f"Error: File not found at the expanded path {filepath}"
             self.logger.error(message)
-            return False, message
+            return False, message, False
         except PermissionError as pe:
             message = f"Permission denied when trying to read file {filepath}: {pe}."
             self.logger.error(message)
-            return False, message
+            return False, message, False
         except Exception as e:
             message = f"Error reading file {filepath}: {e}"
             self.logger.error(message)
-            return False, message
+            return False, message, False
+
+    @staticmethod
+    def _command_args(command: str, shell_type: str) -> tuple[list[str] | str, bool]:
+        """Returns the (args, shell) pair to hand to subprocess for the given command and shell type."""
+        if os.name == 'nt': # Windows specific handling for shell=True safety
+            if shell_type == "powershell":
+                # Using list form for powershell is generally safer
+                return ["powershell", "-NoProfile", "-Command", command], False
+            return command, True # Default to CMD
+        # POSIX (Linux/macOS)
+        if shell_type in ["bash", "sh", "zsh", "powershell"]: # powershell can be on linux too
+            return [shell_type, "-c", command], False
+        return command.split(), False # Treat as a direct command if shell_type is not a known shell
 
     def execute_command(self, command: str, shell_type: str = None) -> tuple[bool, str]:
         """
@@ -172,17 +242,8 @@ class OSInteraction:
 
         self.logger.info(f"Attempting to execute {shell_type} command: {command[:200]}{'...' if len(command) > 200 else ''}")
         try:
-            if os.name == 'nt': # Windows specific handling for shell=True safety
-                if shell_type.lower() == "powershell":
-                    # Using list form for powershell is generally safer
-                    process = subprocess.run(["powershell", "-NoProfile", "-Command", command], capture_output=True, text=True, check=True, timeout=30)
-                else: # Default to CMD
-                    process = subprocess.run(command, capture_output=True, text=True, check=True, shell=True, timeout=30)
-            else: # POSIX (Linux/macOS)
-                if shell_type.lower() in ["bash", "sh", "zsh", "powershell"]: # powershell can be on linux too
-                     process = subprocess.run([shell_type, "-c", command], capture_output=True, text=True, check=True, timeout=30)
-                else: # Treat as a direct command if shell_type is not a known shell
-                    process = subprocess.run(command.split(), capture_output=True, text=True, check=True, shell=False, timeout=30)
+            args, use_shell = self._command_args(command, shell_type)
+            process = subprocess.run(args, capture_output=True, text=True, check=True, shell=use_shell, timeout=self.COMMAND_TIMEOUT_SECONDS)
 
             output = process.stdout if process.stdout else ""
             if process.stderr:
@@ -207,6 +268,64 @@ class OSInteraction:
             self.logger.error(error_message)
             return False, error_message
 
+    def execute_command_stream(self, command: str, shell_type: str = None, timeout: float = COMMAND_TIMEOUT_SECONDS) -> Iterator[str]:
+        """
+        Runs a command like execute_command, but yields its output (stdout and stderr interleaved) line by
+        line as it is produced, instead of buffering all of it until the command exits.
+        Raises subprocess.CalledProcessError on a non-zero exit, subprocess.TimeoutExpired if the command
+        runs longer than `timeout` (it is killed), and FileNotFoundError if the shell/command isn't found.
+        """
+        if shell_type is None:
+            shell_type = "cmd" if os.name == 'nt' else "sh"
+        shell_type = shell_type.lower()
+
+        self.logger.info(f"Attempting to stream {shell_type} command: {command[:200]}{'...' if len(command) > 200 else ''}")
+        args, use_shell = self._command_args(command, shell_type)
+        # On POSIX the command gets its own process group, so a timeout also kills anything the shell
+        # started (otherwise a child could keep the pipe open and readline() blocking).
+        process = subprocess.Popen(
+            args, shell=use_shell, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+            errors="replace", # Output that isn't valid in the locale's encoding must not abort the stream
+            start_new_session=os.name != 'nt'
+        )
+        timed_out = threading.Event()
+
+        def kill():
+            try:
+                if os.name == 'nt':
+                    process.kill()
+                else:
+                    os.killpg(process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass # Already exited
+
+        def kill_on_timeout():
+            timed_out.set()
+            kill()
+
+        # A timer rather than select() on the pipe, since select doesn't work on pipes on Windows
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.daemon = True
+        timer.start()
+        try:
+            with process.stdout:
+                for line in iter(process.stdout.readline, ''):
+                    yield line.rstrip("\n")
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None: # The caller stopped iterating early
+                kill()
+                process.wait()
+
+        if timed_out.is_set():
+            self.logger.error(f"Command '{command}' timed out after {timeout} seconds.")
+            raise subprocess.TimeoutExpired(command, timeout)
+        if returncode != 0:
+            self.logger.error(f"Command '{command}' exited with code {returncode}.")
+            raise subprocess.CalledProcessError(returncode, command)
+        self.logger.info(f"Executed streamed '{shell_type}' command: {command}")
+
     def set_brightness(self, level: int) -> tuple[bool, str]:
         """Sets screen brightness (0-100)."""
         self.logger.info(f"Attempting to set brightness to {level}%")
@@ -313,6 +432,28 @@ if __name__ == '__main__':
         assert read_success
         assert "Hello from OSInteraction module!" in content
 
+        head_success, head, truncated = os_interaction.read_file_head(test_file_path, 10)
+        logger.info(f"Read first 10 bytes of '{test_file_path}': {head_success} - '{head}' (truncated: {truncated})")
+        assert head_success and head == "Hello from" and truncated
+        head_success, head, truncated = os_interaction.read_file_head(test_file_path, 4096)
+        assert head_success and head == content and not truncated
+
+    # Test reading the head of a non-UTF-8 file
+    latin1_path = os.path.join(test_dir, "latin1.txt")
+    with open(latin1_path, "wb") as f:
+        f.write("café ".encode("latin-1") * 10)
+    head_success, head, truncated = os_interaction.read_file_head(latin1_path, 12)
+    logger.info(f"Read head of non-UTF-8 file: {head_success} - '{head}' (truncated: {truncated})")
+    assert head_success and head.startswith("caf") and truncated
+    os.remove(latin1_path)
+
+    # Test creating several files at once
+    batch_paths = [os.path.join(test_dir, "batch", f"file_{i}.txt") for i in range(3)]
+    batch_results = os_interaction.create_files([(path, f"File {i}", "txt") for i, path in enumerate(batch_paths)])
+    logger.info(f"Create files in batch: {batch_results}")
+    assert all(success for success, _ in batch_results) and all(os.path.isfile(path) for path in batch_paths)
+    shutil.rmtree(os.path.join(test_dir, "batch"))
+
     # Test list directory
     success_list, contents = os_interaction.list_directory_contents(test_dir)
     logger.info(f"List directory '{test_dir}': {success_list} - {contents}")
@@ -352,6 +493,10 @@ if __name__ == '__main__':
     assert success_cmd
     assert "Hello Jarvis Assistant" in output_cmd
 
+    streamed_lines = list(os_interaction.execute_command_stream("echo line one && echo line two", shell_type=shell))
+    logger.info(f"Streamed command output: {streamed_lines}")
+    assert streamed_lines == ["line one", "line two"]
+
     logger.info("\nTesting system settings (brightness/volume):")
     success_bright, msg_bright = os_interaction.set_brightness(75)
     logger.info(f"Set brightness: {success_bright} - {msg_bright}")
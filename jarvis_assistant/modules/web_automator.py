@@ -257,8 +257,10 @@ class WebAutomator:
         #     #     EC.presence_of_element_located((By.ID, "some_form_element_id"))
         #     # )
 
+        #     # One bulk read for all fields instead of a keyring round trip per field
+        #     values = self.security_manager.get_many(username_for_secrets, user_details_keys.values())
         #     for field_locator, data_key in user_details_keys.items():
-        #         value_to_fill = self.security_manager.get_sensitive_data(username_for_secrets, data_key)
+        #         value_to_fill = values[data_key]
         #         if value_to_fill:
         #             try:
         #                 # This assumes field_locator is an ID. Adapt for name, xpath, etc.
@@ -330,9 +332,12 @@ class WebAutomator:
         print("Simulated: Filled shipping information using stored details.")
 
         # 5. Fill payment information (Placeholder - EXTREMELY SENSITIVE)
-        # payment_cc_number = self.security_manager.get_sensitive_data(username_for_secrets, "credit_card_number")
-        # payment_cc_expiry = self.security_manager.get_sensitive_data(username_for_secrets, "credit_card_expiry")
-        # payment_cc_cvv = self.security_manager.get_sensitive_data(username_for_secrets, "credit_card_cvv")
+        # payment = self.security_manager.get_many(
+        #     username_for_secrets, ["credit_card_number", "credit_card_expiry", "credit_card_cvv"]
+        # )
+        # payment_cc_number = payment["credit_card_number"]
+        # payment_cc_expiry = payment["credit_card_expiry"]
+        # payment_cc_cvv = payment["credit_card_cvv"]
         # if payment_cc_number and payment_cc_expiry and payment_cc_cvv:
         #     # Fill payment form fields using Selenium
         #     print("Simulated: Filled payment information using stored details.")
@@ -1,5 +1,8 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
 
 LOG_DIR = "logs"
@@ -9,14 +12,31 @@ if not os.path.exists(LOG_DIR):
 log_filename = datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".log"
 log_filepath = os.path.join(LOG_DIR, log_filename)
 
+_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler(log_filepath)
+_file_handler.setFormatter(_formatter)
+_console_handler = logging.StreamHandler() # Also print to console
+_console_handler.setFormatter(_formatter)
+# Routine records are buffered and written to the file in batches instead of one write per record.
+# Anything at WARNING or above flushes the buffer at once, so problems reach the file immediately.
+_file_buffer = logging.handlers.MemoryHandler(capacity=32, flushLevel=logging.WARNING, target=_file_handler)
+
+# Loggers only put records on a queue; a background listener thread does the file and console writes,
+# so logging from the listen/speak paths never blocks on terminal or disk I/O.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_listener = logging.handlers.QueueListener(_log_queue, _file_buffer, _console_handler)
+_queue_listener.start()
+# atexit runs these in reverse: drain the queue first, then write out whatever is still buffered
+atexit.register(_file_buffer.flush)
+atexit.register(_queue_listener.stop)
+
 # Basic Configuration for logging
+# The queue handler's own format is just the message: it only pre-renders %-args (and tracebacks)
+# before the record crosses threads. The real format is applied by the handlers above.
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filepath),
-        logging.StreamHandler() # Also print to console
-    ]
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 
 def get_logger(name: str) -> logging.Logger: